@@ -0,0 +1,56 @@
+"""expenses note search indexes
+
+Revision ID: 000cb7e7e3d8
+Revises: a8c18d359fe8
+Create Date: 2026-10-18 13:40:09.127655
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '000cb7e7e3d8'
+down_revision: Union[str, Sequence[str], None] = 'a8c18d359fe8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.add_column(
+        'expenses',
+        sa.Column(
+            'note_tsv',
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "to_tsvector('simple', coalesce(note, ''))",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        'ix_expenses_user_note_tsv',
+        'expenses',
+        ['user_id', 'note_tsv'],
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_expenses_user_note_trgm',
+        'expenses',
+        ['user_id', 'note'],
+        postgresql_using='gin',
+        postgresql_ops={'note': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_expenses_user_note_trgm', table_name='expenses')
+    op.drop_index('ix_expenses_user_note_tsv', table_name='expenses')
+    op.drop_column('expenses', 'note_tsv')
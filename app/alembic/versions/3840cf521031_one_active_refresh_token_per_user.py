@@ -0,0 +1,50 @@
+"""one active refresh token per user
+
+Revision ID: 3840cf521031
+Revises: 7a2f7abd77f2
+Create Date: 2026-10-18 16:47:12.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3840cf521031'
+down_revision: Union[str, Sequence[str], None] = '7a2f7abd77f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # racing logins may have left several live tokens, keep the
+    # newest one of every user
+    op.execute(
+        """
+        UPDATE refresh_tokens SET revoked_at = now()
+        WHERE revoked_at IS NULL
+          AND id NOT IN (
+            SELECT DISTINCT ON (user_id) id
+            FROM refresh_tokens
+            WHERE revoked_at IS NULL
+            ORDER BY user_id, created_at DESC, id DESC
+          )
+        """
+    )
+    op.create_index(
+        'ix_refresh_tokens_user_active',
+        'refresh_tokens',
+        ['user_id'],
+        unique=True,
+        postgresql_where=sa.text('revoked_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_refresh_tokens_user_active', table_name='refresh_tokens'
+    )
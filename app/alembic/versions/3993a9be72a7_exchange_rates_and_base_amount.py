@@ -0,0 +1,58 @@
+"""exchange rates and base amount
+
+Revision ID: 3993a9be72a7
+Revises: 44da5ec89e1e
+Create Date: 2026-10-18 15:32:08.417265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3993a9be72a7'
+down_revision: Union[str, Sequence[str], None] = '44da5ec89e1e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'exchange_rate',
+        sa.Column('rate_date', sa.Date(), nullable=False),
+        sa.Column('from_currency_id', sa.Integer(), nullable=False),
+        sa.Column('to_currency_id', sa.Integer(), nullable=False),
+        sa.Column('rate', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['from_currency_id'], ['currency.id'], ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(
+            ['to_currency_id'], ['currency.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint(
+            'rate_date', 'from_currency_id', 'to_currency_id'
+        ),
+    )
+    op.add_column(
+        'expenses',
+        sa.Column('base_amount', sa.Float(), nullable=True),
+    )
+    op.add_column(
+        'expense_monthly_rollup',
+        sa.Column(
+            'base_total',
+            sa.Float(),
+            server_default='0',
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('expense_monthly_rollup', 'base_total')
+    op.drop_column('expenses', 'base_amount')
+    op.drop_table('exchange_rate')
@@ -0,0 +1,56 @@
+"""expenses filter indexes
+
+Revision ID: 44da5ec89e1e
+Revises: 000cb7e7e3d8
+Create Date: 2026-10-18 14:55:36.602418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '44da5ec89e1e'
+down_revision: Union[str, Sequence[str], None] = '000cb7e7e3d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_expenses_user_category_date_id',
+        'expenses',
+        [
+            'user_id',
+            'category_id',
+            sa.text('expense_date DESC'),
+            sa.text('id DESC'),
+        ],
+    )
+    op.create_index(
+        'ix_expenses_user_currency_date_id',
+        'expenses',
+        [
+            'user_id',
+            'currency_id',
+            sa.text('expense_date DESC'),
+            sa.text('id DESC'),
+        ],
+    )
+    op.create_index(
+        'ix_expenses_user_amount', 'expenses', ['user_id', 'amount']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_expenses_user_amount', table_name='expenses')
+    op.drop_index(
+        'ix_expenses_user_currency_date_id', table_name='expenses'
+    )
+    op.drop_index(
+        'ix_expenses_user_category_date_id', table_name='expenses'
+    )
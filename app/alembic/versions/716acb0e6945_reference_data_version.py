@@ -0,0 +1,74 @@
+"""reference data version
+
+Revision ID: 716acb0e6945
+Revises: 3840cf521031
+Create Date: 2026-10-18 17:36:05.318247
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '716acb0e6945'
+down_revision: Union[str, Sequence[str], None] = '3840cf521031'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REFERENCE_TABLES = ('expenses_category', 'currency')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'reference_data_version',
+        sa.Column('id', sa.SmallInteger(), nullable=False),
+        sa.Column(
+            'version',
+            sa.BigInteger(),
+            server_default='0',
+            nullable=False,
+        ),
+        sa.CheckConstraint('id = 1'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute('INSERT INTO reference_data_version (id) VALUES (1)')
+    # NOTIFY is delivered on commit, listeners reload committed maps
+    op.execute(
+        """
+        CREATE FUNCTION bump_reference_data_version()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            new_version bigint;
+        BEGIN
+            UPDATE reference_data_version
+            SET version = version + 1
+            WHERE id = 1
+            RETURNING version INTO new_version;
+            PERFORM pg_notify('reference_data', new_version::text);
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    for table in REFERENCE_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_reference_data_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION bump_reference_data_version()
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in REFERENCE_TABLES:
+        op.execute(
+            f'DROP TRIGGER {table}_reference_data_version ON {table}'
+        )
+    op.execute('DROP FUNCTION bump_reference_data_version()')
+    op.drop_table('reference_data_version')
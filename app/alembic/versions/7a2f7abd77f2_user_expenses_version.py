@@ -0,0 +1,36 @@
+"""user expenses version
+
+Revision ID: 7a2f7abd77f2
+Revises: 3993a9be72a7
+Create Date: 2026-10-18 15:58:41.203517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2f7abd77f2'
+down_revision: Union[str, Sequence[str], None] = '3993a9be72a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'user',
+        sa.Column(
+            'expenses_version',
+            sa.BigInteger(),
+            server_default='0',
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'expenses_version')
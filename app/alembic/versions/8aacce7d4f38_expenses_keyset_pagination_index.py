@@ -0,0 +1,32 @@
+"""expenses keyset pagination index
+
+Revision ID: 8aacce7d4f38
+Revises: f44f14842a25
+Create Date: 2026-10-18 10:12:31.418204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8aacce7d4f38'
+down_revision: Union[str, Sequence[str], None] = 'f44f14842a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_expenses_user_date_id',
+        'expenses',
+        ['user_id', sa.text('expense_date DESC'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_expenses_user_date_id', table_name='expenses')
@@ -0,0 +1,77 @@
+"""rollup reference data delete
+
+Revision ID: 9f1eef109547
+Revises: ec8309330c71
+Create Date: 2026-10-18 21:04:12.731598
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f1eef109547'
+down_revision: Union[str, Sequence[str], None] = 'ec8309330c71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# reference table, the expenses column set to NULL when a row of it
+# is deleted, and the rollup key columns copied as they are
+REFERENCE_COLUMNS = (
+    ('expenses_category', 'category_id', 'currency_id'),
+    ('currency', 'currency_id', 'category_id'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ON DELETE SET NULL moves the expenses to bucket 0, the rollup
+    # rows of the deleted id follow in the same transaction
+    for table, column, kept in REFERENCE_COLUMNS:
+        op.execute(
+            f"""
+            CREATE FUNCTION {table}_rollup_to_bucket_zero()
+            RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                INSERT INTO expense_monthly_rollup AS r (
+                    user_id, year, month, {column}, {kept},
+                    total, base_total, count, unconverted
+                )
+                SELECT user_id, year, month, 0, {kept},
+                       total, base_total, count, unconverted
+                FROM expense_monthly_rollup
+                WHERE {column} = OLD.id
+                ON CONFLICT (
+                    user_id, year, month, category_id, currency_id
+                ) DO UPDATE SET
+                    total = r.total + excluded.total,
+                    base_total = r.base_total + excluded.base_total,
+                    count = r.count + excluded.count,
+                    unconverted =
+                        r.unconverted + excluded.unconverted;
+                DELETE FROM expense_monthly_rollup
+                WHERE {column} = OLD.id;
+                RETURN NULL;
+            END;
+            $$
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_rollup_to_bucket_zero
+            AFTER DELETE ON {table}
+            FOR EACH ROW
+            EXECUTE FUNCTION {table}_rollup_to_bucket_zero()
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, _, _ in REFERENCE_COLUMNS:
+        op.execute(
+            f'DROP TRIGGER {table}_rollup_to_bucket_zero ON {table}'
+        )
+        op.execute(f'DROP FUNCTION {table}_rollup_to_bucket_zero()')
@@ -0,0 +1,53 @@
+"""expense monthly rollup
+
+Revision ID: a8c18d359fe8
+Revises: 8aacce7d4f38
+Create Date: 2026-10-18 11:02:47.905113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c18d359fe8'
+down_revision: Union[str, Sequence[str], None] = '8aacce7d4f38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Existing expenses are backfilled with
+    `python -m commands.rebuild_rollup`.
+    """
+    op.create_table(
+        'expense_monthly_rollup',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('currency_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'total', sa.Float(), server_default=sa.text('0'),
+            nullable=False,
+        ),
+        sa.Column(
+            'count', sa.Integer(), server_default=sa.text('0'),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ['user_id'], ['user.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint(
+            'user_id', 'year', 'month', 'category_id', 'currency_id'
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('expense_monthly_rollup')
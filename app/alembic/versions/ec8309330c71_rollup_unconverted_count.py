@@ -0,0 +1,58 @@
+"""rollup unconverted count
+
+Revision ID: ec8309330c71
+Revises: 716acb0e6945
+Create Date: 2026-10-18 18:12:40.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ec8309330c71'
+down_revision: Union[str, Sequence[str], None] = '716acb0e6945'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'expense_monthly_rollup',
+        sa.Column(
+            'unconverted',
+            sa.Integer(),
+            server_default='0',
+            nullable=False,
+        ),
+    )
+    op.execute(
+        """
+        UPDATE expense_monthly_rollup AS r
+        SET unconverted = missing.count
+        FROM (
+            SELECT user_id,
+                   extract(year FROM expense_date) AS year,
+                   extract(month FROM expense_date) AS month,
+                   coalesce(category_id, 0) AS category_id,
+                   coalesce(currency_id, 0) AS currency_id,
+                   count(*) AS count
+            FROM expenses
+            WHERE base_amount IS NULL
+            GROUP BY 1, 2, 3, 4, 5
+        ) AS missing
+        WHERE r.user_id = missing.user_id
+          AND r.year = missing.year
+          AND r.month = missing.month
+          AND r.category_id = missing.category_id
+          AND r.currency_id = missing.currency_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('expense_monthly_rollup', 'unconverted')
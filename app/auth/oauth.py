@@ -1,13 +1,18 @@
 import uuid
 from fastapi import status, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
+from jose import JWTError, jwt
+from sqlalchemy import select
 from schemas.schemas import TokenPayload
-from database import get_db
+from database import ReadSessionLocal
 from models.models import User
 from core.settings import settings
 from core.errors import InvalidTokenError
+from auth.principal_cache import (
+    Principal,
+    principal_cache,
+    token_payload_cache,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="login", auto_error=False
@@ -24,24 +29,59 @@ def verify_access_token(
             algorithms=[settings.ALGORITHM],
         )
         return TokenPayload(**payload)
-    except InvalidTokenError:
+    except (InvalidTokenError, JWTError):
         raise credential_exception
 
 
+def cached_access_token(
+    token: str, credential_exception: Exception
+) -> TokenPayload:
+    """verify_access_token, remembered by token digest"""
+    digest = token_payload_cache.digest(token)
+    token_data = token_payload_cache.get(digest)
+    if token_data is None:
+        token_data = verify_access_token(token, credential_exception)
+        if token_data.sub:
+            token_payload_cache.set(digest, token_data)
+    return token_data
+
+
+async def load_principal(user_id: uuid.UUID) -> Principal | None:
+    hit, principal = principal_cache.get(user_id, "principal")
+    if hit:
+        return principal
+    generation = principal_cache.generation(user_id)
+    async with ReadSessionLocal() as db:  # type: ignore
+        result = await db.execute(
+            select(User.id, User.is_active).where(User.id == user_id)
+        )
+        row = result.first()
+    if not row:
+        return None
+    principal = Principal(row.id, row.is_active)
+    principal_cache.set(user_id, "principal", principal, generation)
+    return principal
+
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db),
-) -> User:
+    token: str | None = Depends(oauth2_scheme),
+) -> Principal:
+    """
+    Principal of the caller, from the per-worker caches when it can.
+    A miss reads (id, is_active) in its own read-only session, so no
+    connection is held while the endpoint runs.
+    """
     credential_exception: Exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Unathorized",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token_data = verify_access_token(token, credential_exception)
+    if not token:
+        raise credential_exception
+    token_data = cached_access_token(token, credential_exception)
     if not token_data.sub:
         raise credential_exception
-    uid: uuid.UUID = token_data.sub
-    user = await db.get(User, uid)
-    if not user:
+    principal = await load_principal(token_data.sub)
+    if not principal or not principal.is_active:
         raise credential_exception
-    return user
+    return principal
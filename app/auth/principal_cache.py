@@ -0,0 +1,91 @@
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple
+from core.settings import settings
+from schemas.schemas import TokenPayload
+from utility.result_cache import LRUResultCache
+
+
+class Principal(NamedTuple):
+    """What routes need to know about the caller"""
+
+    id: uuid.UUID
+    is_active: bool
+
+
+class TokenPayloadCache:
+    """
+    Decoded access token payloads by token digest. An entry never
+    outlives the token's exp, so an expired token is always decoded
+    again and rejected.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[
+            bytes, tuple[float, TokenPayload]
+        ] = OrderedDict()
+        self._by_user: dict[uuid.UUID, set[bytes]] = {}
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def _drop(self, digest: bytes) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        user_id = entry[1].sub
+        digests = self._by_user.get(user_id)  # type: ignore
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[user_id]  # type: ignore
+
+    def get(self, digest: bytes) -> TokenPayload | None:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._drop(digest)
+            return None
+        self._entries.move_to_end(digest)
+        return entry[1]
+
+    def set(self, digest: bytes, payload: TokenPayload) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        if payload.exp is not None:
+            expires_at = min(expires_at, payload.exp)
+        self._entries[digest] = (expires_at, payload)
+        self._entries.move_to_end(digest)
+        user_id: uuid.UUID = payload.sub  # type: ignore
+        self._by_user.setdefault(user_id, set()).add(digest)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        for digest in list(self._by_user.get(user_id, ())):
+            self._drop(digest)
+
+
+# per worker, other workers keep their entries until the TTL ends
+principal_cache = LRUResultCache(
+    settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+token_payload_cache = TokenPayloadCache(
+    settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_principal(user_id: uuid.UUID) -> None:
+    """
+    Call on logout, and once a deactivation or password change is
+    committed, so this worker checks the user and its tokens again.
+    """
+    principal_cache.invalidate_user(user_id)
+    token_payload_cache.invalidate_user(user_id)
@@ -0,0 +1,95 @@
+"""
+Fills expenses.base_amount where it is NULL, using the rates known
+now, in id batches. The amount is computed in the UPDATE itself,
+from the row as it is then, so a concurrent edit is never
+overwritten with a stale value. Run from the app directory, then
+rebuild the rollup so base_total picks the new amounts up:
+
+    python -m commands.backfill_base_amount --batch-size 1000
+    python -m commands.rebuild_rollup
+"""
+
+import argparse
+import asyncio
+import logging
+from sqlalchemy import select, update
+from core.settings import settings
+from database import AsyncSessionLocal, engine
+from models.models import Expenses
+from repositories.currency_repository import CurrencyRepository
+from repositories.expense_repository import ExpenseRepository
+
+logger = logging.getLogger("backfill_base_amount")
+
+
+async def load_base_currency_id() -> int | None:
+    async with AsyncSessionLocal() as session:  # type: ignore
+        currency_repo = CurrencyRepository(session)  # type: ignore
+        currencies = await currency_repo.get_all()
+    return {c.code: c.id for c in currencies}.get(
+        settings.BASE_CURRENCY
+    )
+
+
+async def backfill(batch_size: int) -> int:
+    base_currency_id = await load_base_currency_id()
+    after = 0
+    filled = 0
+    while True:
+        async with AsyncSessionLocal() as session:  # type: ignore
+            result = await session.execute(  # type: ignore
+                select(Expenses.id)
+                .where(
+                    Expenses.id > after,
+                    Expenses.base_amount.is_(None),
+                )
+                .order_by(Expenses.id)
+                .limit(batch_size)
+            )
+            ids = result.scalars().all()
+            if not ids:
+                break
+            repo = ExpenseRepository(
+                session,  # type: ignore
+                base_currency_id=base_currency_id,
+            )
+            base_amount = repo._base_amount(
+                Expenses.amount,
+                Expenses.currency_id,
+                Expenses.expense_date,
+            )
+            # rows filled or deleted since the SELECT are skipped
+            result = await session.execute(  # type: ignore
+                update(Expenses)
+                .where(
+                    Expenses.id.in_(ids),
+                    Expenses.base_amount.is_(None),
+                )
+                .values(base_amount=base_amount)
+                .returning(Expenses.base_amount)
+                .execution_options(synchronize_session=False)
+            )
+            converted = sum(
+                amount is not None for amount in result.scalars()
+            )
+            await session.commit()  # type: ignore
+        after = ids[-1]
+        filled += converted
+        logger.info(f"filled {converted} expenses up to {after}")
+    return filled
+
+
+async def main(batch_size: int) -> None:
+    try:
+        filled = await backfill(batch_size)
+        logger.info(f"done, {filled} expenses filled")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
@@ -0,0 +1,113 @@
+"""
+Time per request that FastAPI spends resolving the dependencies of
+the expense and auth routes. Endpoints with the real dependencies
+but empty bodies are called in process through ASGI, minus an
+endpoint without dependencies. Sessions are opened but never
+query, so no database is needed. Run from the app directory:
+
+    python -m commands.bench_dependencies --rounds 20000
+"""
+
+import argparse
+import asyncio
+import time
+from fastapi import Depends, FastAPI
+from core.container import Container
+from core.reference_data import ReferenceData
+from core.settings import settings
+from dependancies.expenses.expenses_router_dependancy import (
+    get_expense_service,
+    get_read_expense_service,
+)
+from dependancies.user.user_router_dependancy import get_user_service
+from utility.hashing_pool import HashingPool, ProcessHashingPool
+
+app = FastAPI()
+
+
+@app.get("/none")
+async def no_dependencies():
+    return None
+
+
+@app.get("/expenses")
+async def expense_route(service=Depends(get_expense_service)):
+    return None
+
+
+@app.get("/expenses/read")
+async def read_expense_route(
+    service=Depends(get_read_expense_service),
+):
+    return None
+
+
+@app.get("/auth")
+async def auth_route(service=Depends(get_user_service)):
+    return None
+
+
+async def request(path: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {
+            "type": "http.request",
+            "body": b"",
+            "more_body": False,
+        }
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(path: str, rounds: int) -> float:
+    """Microseconds per request"""
+    for _ in range(100):
+        await request(path)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await request(path)
+    return (time.perf_counter() - start) / rounds * 1_000_000
+
+
+async def main(rounds: int) -> None:
+    app.state.container = Container(
+        settings,
+        ReferenceData(),
+        HashingPool(1, 1),
+        ProcessHashingPool(1, 1),
+        None,
+    )
+    baseline = await measure("/none", rounds)
+    print(f"{rounds} requests per route")
+    print(f"no dependencies: {baseline:8.1f} us/request")
+    for path in ("/expenses", "/expenses/read", "/auth"):
+        spent = await measure(path, rounds)
+        print(
+            f"{path:<16} {spent:8.1f} us/request, "
+            f"{spent - baseline:8.1f} us resolving"
+        )
+    app.state.container.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds))
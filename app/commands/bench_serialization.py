@@ -0,0 +1,100 @@
+"""
+CPU time to turn one page of SQL row mappings into a JSON body, for
+the path FastAPI takes through response_model and for the direct
+one. The response_model path runs FastAPI's own serialize_response
+and JSONResponse. Needs no database. Run from the app directory:
+
+    python -m commands.bench_serialization --rows 50
+"""
+
+import argparse
+import time
+from datetime import date
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from schemas.schemas import GetExpenses, GetExpensesList
+
+# what APIRoute builds for response_model=list[GetExpenses]
+RESPONSE_FIELD = create_model_field(
+    name="Response_bench",
+    type_=list[GetExpenses],
+    mode="serialization",
+)
+
+
+def make_rows(count: int) -> list[dict]:
+    day = date(2026, 10, 18)
+    return [
+        {
+            "id": expense_id,
+            "category_name": "Food",
+            "currency_code": "USD",
+            "amount": 12.5 + expense_id,
+            "note": f"lunch number {expense_id}",
+            "expense_date": day,
+            "year": day.year,
+            "month": day.month,
+            "day": day.day,
+        }
+        for expense_id in range(count)
+    ]
+
+
+def run_to_completion(coroutine):
+    """serialize_response awaits nothing for async endpoints"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("serialize_response suspended")
+
+
+def response_model_path(rows: list[dict]) -> bytes:
+    """
+    model_validate per row in the repository, then FastAPI validates
+    the list against response_model, serializes it and JSONResponse
+    renders it
+    """
+    items = [GetExpenses.model_validate(row) for row in rows]
+    content = run_to_completion(
+        serialize_response(
+            field=RESPONSE_FIELD,
+            response_content=items,
+            is_coroutine=True,
+        )
+    )
+    return JSONResponse(content).body
+
+
+def direct_path(rows: list[dict]) -> bytes:
+    """One batched validation, one dump straight to bytes"""
+    items = GetExpensesList.validate_python(rows)
+    return Response(
+        GetExpensesList.dump_json(items),
+        media_type="application/json",
+    ).body
+
+
+def measure(path, rows: list[dict], rounds: int) -> float:
+    """Microseconds of process CPU time per page"""
+    path(rows)
+    start = time.process_time()
+    for _ in range(rounds):
+        path(rows)
+    return (time.process_time() - start) / rounds * 1_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5000)
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+    before = measure(response_model_path, rows, args.rounds)
+    after = measure(direct_path, rows, args.rounds)
+    print(f"{args.rows} rows per page, {args.rounds} rounds")
+    print(f"response_model: {before:9.1f} us/page")
+    print(f"direct:         {after:9.1f} us/page")
+    print(f"speedup:        {before / after:9.2f}x")
@@ -0,0 +1,42 @@
+"""
+Finds the highest bcrypt cost that hashes within a target time on
+this machine. Run from the app directory and put the printed value
+into the environment:
+
+    python -m commands.calibrate_bcrypt --target-ms 250
+"""
+
+import argparse
+import statistics
+import time
+from repositories.password_repository import bcrypt_hash
+
+
+def median_ms(rounds: int, samples: int) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt_hash("calibration password", rounds)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int) -> int:
+    """A round more doubles the cost, so stop at the first too slow"""
+    chosen = 4
+    for rounds in range(4, 32):
+        elapsed = median_ms(rounds, samples)
+        print(f"rounds {rounds:2d}: {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+    rounds = calibrate(args.target_ms, args.samples)
+    print(f"BCRYPT_ROUNDS={rounds}")
@@ -0,0 +1,161 @@
+"""
+Query-plan check of the expense listing: seeds synthetic users and
+expenses inside a transaction, runs ANALYZE, then EXPLAINs the
+listing query for every combination of filters and fails when any
+plan reads expenses with a sequential scan. Everything is rolled
+back at the end. note_prefix plans rely on the pg_trgm / btree_gin
+indexes. Run from the app directory:
+
+    python -m commands.explain_filters --users 200 --per-user 200
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal, engine
+from models.models import Category, Currency, Expenses, User
+from repositories.expense_repository import ExpenseRepository
+from schemas.schemas import ExpenseFilter, PaginationParams
+
+logger = logging.getLogger("explain_filters")
+
+NOTES = ("lunch", "taxi home", "groceries", "rent", "coffee")
+
+
+async def seed(
+    session: AsyncSession,
+    users: int,
+    per_user: int,
+    category_ids: list[int],
+    currency_ids: list[int],
+) -> uuid.UUID:
+    """Inserts the synthetic rows, returns the user to plan for"""
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    await session.execute(
+        insert(User),
+        [
+            {
+                "id": user_id,
+                "email": f"explain-{user_id}@example.com",
+                "password": "-",
+            }
+            for user_id in user_ids
+        ],
+    )
+    today = date.today()
+    rows = [
+        {
+            "user_id": user_id,
+            "category_id": random.choice(category_ids),
+            "currency_id": random.choice(currency_ids),
+            "amount": round(random.uniform(1, 500), 2),
+            "note": random.choice(NOTES),
+            "expense_date": today - timedelta(random.randrange(730)),
+        }
+        for user_id in user_ids
+        for _ in range(per_user)
+    ]
+    await session.execute(insert(Expenses), rows)
+    await session.execute(text("ANALYZE expenses"))
+    return user_ids[0]
+
+
+def filter_combinations(
+    category_ids: list[int], currency_ids: list[int]
+) -> list[tuple[str, ExpenseFilter]]:
+    today = date.today()
+    options = {
+        "date": {
+            "date_from": today - timedelta(30),
+            "date_to": today,
+        },
+        "amount": {"amount_min": 10, "amount_max": 50},
+        "category": {"category_ids": category_ids[:2]},
+        "currency": {"currency_ids": currency_ids[:1]},
+        "note_prefix": {"note_prefix": "lun"},
+    }
+    combinations = []
+    for size in range(len(options) + 1):
+        for names in itertools.combinations(options, size):
+            values = {}
+            for name in names:
+                values.update(options[name])
+            combinations.append(
+                (" + ".join(names) or "none", ExpenseFilter(**values))
+            )
+    return combinations
+
+
+def scans(plan: dict) -> list[tuple[str, str]]:
+    """(node type, relation or index) of every scan in the plan"""
+    found = []
+    if plan["Node Type"] == "Seq Scan":
+        found.append(("Seq Scan", plan["Relation Name"]))
+    elif "Index Name" in plan:
+        found.append((plan["Node Type"], plan["Index Name"]))
+    for child in plan.get("Plans", []):
+        found.extend(scans(child))
+    return found
+
+
+async def explain(session: AsyncSession, query) -> dict:
+    connection = await session.connection()
+    sql = query.compile(
+        dialect=connection.dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {sql}"
+    )
+    return result.scalar_one()[0]["Plan"]
+
+
+async def main(users: int, per_user: int) -> bool:
+    ok = True
+    try:
+        async with AsyncSessionLocal() as session:  # type: ignore
+            category_ids = list(
+                (await session.scalars(select(Category.id))).all()
+            )
+            currency_ids = list(
+                (await session.scalars(select(Currency.id))).all()
+            )
+            user_id = await seed(
+                session, users, per_user, category_ids, currency_ids
+            )
+            repo = ExpenseRepository(session)
+            for name, filters in filter_combinations(
+                category_ids, currency_ids
+            ):
+                query = repo.user_expenses_query(
+                    user_id, PaginationParams(), filters
+                )
+                plan = await explain(session, query)
+                found = scans(plan)
+                passed = ("Seq Scan", "expenses") not in found
+                ok = ok and passed
+                logger.info(
+                    f"{'ok ' if passed else 'SEQ'} {name}: "
+                    + ", ".join(target for _, target in found)
+                )
+            await session.rollback()
+    finally:
+        await engine.dispose()
+    return ok
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--per-user", type=int, default=200)
+    args = parser.parse_args()
+    passed = asyncio.run(main(args.users, args.per_user))
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,60 @@
+"""
+Deletes refresh tokens expired or revoked longer than the retention
+window ago, in small batches. Run from the app directory:
+
+    python -m commands.purge_tokens --retention-hours 168
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import timedelta
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from core.settings import settings
+from database import engine
+from services.token_purge import purge_tokens_exclusively
+
+logger = logging.getLogger("purge_tokens")
+
+
+async def main(
+    retention_hours: float, batch_size: int, pause: float
+) -> None:
+    try:
+        purged = await purge_tokens_exclusively(
+            engine,
+            async_sessionmaker(engine),
+            timedelta(hours=retention_hours),
+            batch_size,
+            pause,
+        )
+        if purged is None:
+            logger.info("another purge is running, nothing done")
+        else:
+            logger.info(f"done, {purged} refresh tokens purged")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--retention-hours",
+        type=float,
+        default=settings.TOKEN_PURGE_RETENTION_HOURS,
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.TOKEN_PURGE_BATCH_SIZE,
+    )
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=settings.TOKEN_PURGE_PAUSE_SECONDS,
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(args.retention_hours, args.batch_size, args.pause)
+    )
@@ -0,0 +1,48 @@
+"""
+Backfills expense_monthly_rollup from expenses, a batch of users per
+transaction. Run from the app directory:
+
+    python -m commands.rebuild_rollup --batch-size 200
+"""
+
+import argparse
+import asyncio
+import logging
+from database import AsyncSessionLocal, engine
+from repositories.rollup_repository import RollupRepository
+
+logger = logging.getLogger("rebuild_rollup")
+
+
+async def rebuild(batch_size: int) -> int:
+    after = None
+    rows = 0
+    while True:
+        async with AsyncSessionLocal() as session:  # type: ignore
+            repo = RollupRepository(session)  # type: ignore
+            user_ids = await repo.get_user_ids_batch(
+                after, batch_size
+            )
+            if not user_ids:
+                break
+            rows += await repo.rebuild_for_users(user_ids)
+            await session.commit()  # type: ignore
+        after = user_ids[-1]
+        logger.info(f"rebuilt {len(user_ids)} users up to {after}")
+    return rows
+
+
+async def main(batch_size: int) -> None:
+    try:
+        rows = await rebuild(batch_size)
+        logger.info(f"done, {rows} rollup rows written")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
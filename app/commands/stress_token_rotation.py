@@ -0,0 +1,82 @@
+"""
+Stress check of replace_tokens: runs many logins of one user at
+once, each in its own session, then requires exactly one live
+refresh token. Needs a database with the user in it. Run from the
+app directory:
+
+    python -m commands.stress_token_rotation --user-id <uuid>
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import uuid
+from sqlalchemy import func, select
+from core.errors import ConcurrentLoginError
+from core.settings import settings
+from database import AsyncSessionLocal, engine
+from models.models import RefreshToken
+from repositories.token_repository import TokenRepository
+from services.token_service import TokenService
+
+logger = logging.getLogger("stress_token_rotation")
+
+
+async def login(user_id: uuid.UUID, tokens: TokenService) -> bool:
+    """One login's token write, False when it lost with a 409"""
+    token, expires_at = tokens.create_refresh_token(user_id)
+    async with AsyncSessionLocal() as session:  # type: ignore
+        repo = TokenRepository(session)  # type: ignore
+        try:
+            await repo.replace_tokens(user_id, token, expires_at)
+        except ConcurrentLoginError:
+            await session.rollback()  # type: ignore
+            return False
+        await session.commit()  # type: ignore
+    return True
+
+
+async def live_tokens(user_id: uuid.UUID) -> int:
+    async with AsyncSessionLocal() as session:  # type: ignore
+        return await session.scalar(  # type: ignore
+            select(func.count()).where(
+                RefreshToken.user_id == user_id,
+                RefreshToken.revoked_at.is_(None),
+            )
+        )
+
+
+async def main(
+    user_id: uuid.UUID, concurrency: int, rounds: int
+) -> bool:
+    tokens = TokenService(settings)
+    ok = True
+    try:
+        for round_number in range(rounds):
+            results = await asyncio.gather(
+                *(login(user_id, tokens) for _ in range(concurrency))
+            )
+            live = await live_tokens(user_id)
+            logger.info(
+                f"round {round_number}: {sum(results)} logins "
+                f"committed, {len(results) - sum(results)} got 409, "
+                f"{live} live tokens"
+            )
+            ok = ok and live == 1 and any(results)
+    finally:
+        await engine.dispose()
+    return ok
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", type=uuid.UUID, required=True)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    passed = asyncio.run(
+        main(args.user_id, args.concurrency, args.rounds)
+    )
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,86 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.settings import Settings
+from core.reference_data import ReferenceData
+from repositories.category_repository import CategoryRepository
+from repositories.currency_repository import CurrencyRepository
+from repositories.expense_repository import (
+    ExpenseRepository,
+    IExpenseRepository,
+)
+from repositories.cached_expense_repository import (
+    CachedExpenseRepository,
+)
+from repositories.password_repository import PasswordHasher
+from repositories.token_repository import TokenRepository
+from repositories.user_repository import UserRepository
+from services.expense_service import ExpenseService
+from services.token_service import TokenService
+from services.user_service import UserService
+from utility.hashing_pool import HashingPool, ProcessHashingPool
+from utility.result_cache import IResultCache
+
+
+class Container:
+    """
+    Everything that lives as long as the app, built once in lifespan.
+    A request only binds its session, see expense_service and
+    user_service.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        reference_data: ReferenceData,
+        hashing_pool: HashingPool,
+        bulk_hashing_pool: ProcessHashingPool,
+        expense_cache: IResultCache | None,
+    ):
+        self.settings = settings
+        self.reference_data = reference_data
+        self.hashing_pool = hashing_pool
+        self.bulk_hashing_pool = bulk_hashing_pool
+        self.expense_cache = expense_cache
+        self.password_hasher = PasswordHasher(
+            hashing_pool, settings.BCRYPT_ROUNDS, bulk_hashing_pool
+        )
+        self.token_service = TokenService(settings)
+
+    def expense_repository(
+        self, db: AsyncSession
+    ) -> IExpenseRepository:
+        currency_map = self.reference_data.maps.currency_map
+        repository = ExpenseRepository(
+            db,
+            base_currency_id=currency_map.get(
+                self.settings.BASE_CURRENCY
+            ),
+        )
+        if self.expense_cache is None:
+            return repository
+        return CachedExpenseRepository(
+            db, repository, self.expense_cache
+        )
+
+    def expense_service(self, db: AsyncSession) -> ExpenseService:
+        # one snapshot per request, a reload swaps both maps together
+        maps = self.reference_data.maps
+        return ExpenseService(
+            db,
+            CategoryRepository(db),
+            CurrencyRepository(db),
+            self.expense_repository(db),
+            maps.currency_map,
+            maps.category_map,
+        )
+
+    def user_service(self, db: AsyncSession) -> UserService:
+        return UserService(
+            UserRepository(db),
+            self.password_hasher,
+            TokenRepository(db),
+            self.token_service,
+        )
+
+    def shutdown(self) -> None:
+        self.hashing_pool.shutdown()
+        self.bulk_hashing_pool.shutdown()
@@ -28,3 +28,27 @@ class CurrencyDoesNotExists(Exception):
 
 class CategoryDoesNotExists(Exception):
     pass
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class HashingPoolSaturated(Exception):
+    pass
+
+
+class InvalidRefreshToken(Exception):
+    pass
+
+
+class RefreshTokenReused(Exception):
+    pass
+
+
+class ConcurrentLoginError(Exception):
+    pass
+
+
+class ImportLineTooLong(Exception):
+    pass
@@ -0,0 +1,182 @@
+from bisect import bisect_left
+from collections import deque
+
+# upper bounds in seconds, the last bucket takes everything slower
+WAIT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# response body sizes in bytes
+SIZE_BUCKETS = (
+    100.0,
+    1_000.0,
+    10_000.0,
+    100_000.0,
+    1_000_000.0,
+    10_000_000.0,
+)
+
+
+class Histogram:
+    """Fixed bucket histogram, snapshot() reports cumulative counts"""
+
+    def __init__(self, buckets: tuple[float, ...] = WAIT_BUCKETS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative = {}
+        running = 0
+        for bound, count in zip(
+            (*map(str, self.buckets), "+Inf"), self._counts
+        ):
+            running += count
+            cumulative[bound] = running
+        return {
+            "buckets": cumulative,
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+class PoolMetrics:
+    """Counters of one connection pool in this worker"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.checkout_wait = Histogram()
+
+    def snapshot(self) -> dict:
+        return {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "checkout_wait_seconds": self.checkout_wait.snapshot(),
+        }
+
+
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+class RequestMetrics:
+    """
+    HTTP counters of this worker. Only the event loop thread updates
+    them, between awaits, so plain dicts need no lock.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.requests: dict[tuple[str, str, int], int] = {}
+        self.latency: dict[tuple[str, str], Histogram] = {}
+        self.sizes: dict[tuple[str, str], Histogram] = {}
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        size: int,
+    ) -> None:
+        key = (method, route)
+        counter = (method, route, status)
+        self.requests[counter] = self.requests.get(counter, 0) + 1
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = Histogram()
+        latency.observe(seconds)
+        sizes = self.sizes.get(key)
+        if sizes is None:
+            sizes = self.sizes[key] = Histogram(SIZE_BUCKETS)
+        sizes.observe(size)
+
+    def snapshot(self) -> dict:
+        """JSON friendly, see utility.prometheus for merging"""
+        return {
+            "in_flight": self.in_flight,
+            "requests": [
+                [*key, count] for key, count in self.requests.items()
+            ],
+            "latency": [
+                [method, route, histogram.snapshot()]
+                for (method, route), histogram in self.latency.items()
+            ],
+            "sizes": [
+                [method, route, histogram.snapshot()]
+                for (method, route), histogram in self.sizes.items()
+            ],
+        }
+
+
+request_metrics = RequestMetrics()
+
+
+class QueryMetrics:
+    """
+    SQL statements of this worker by repository method and route.
+    Percentiles come from the latest durations of each method.
+    """
+
+    def __init__(self, samples: int):
+        self.samples = samples
+        self.counts: dict[tuple[str, str], int] = {}
+        self.seconds: dict[tuple[str, str], float] = {}
+        self.slow: dict[str, int] = {}
+        self.durations: dict[str, deque[float]] = {}
+
+    def observe(
+        self, operation: str, route: str, seconds: float, slow: bool
+    ) -> None:
+        key = (operation, route)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.seconds[key] = self.seconds.get(key, 0.0) + seconds
+        durations = self.durations.get(operation)
+        if durations is None:
+            durations = self.durations[operation] = deque(
+                maxlen=self.samples
+            )
+        durations.append(seconds)
+        if slow:
+            self.slow[operation] = self.slow.get(operation, 0) + 1
+
+    def snapshot(self) -> dict:
+        return {
+            "queries": [
+                [*key, count, self.seconds[key]]
+                for key, count in self.counts.items()
+            ],
+            "slow": [
+                [operation, count]
+                for operation, count in self.slow.items()
+            ],
+            "durations": [
+                [operation, list(durations)]
+                for operation, durations in self.durations.items()
+            ],
+        }
@@ -0,0 +1,69 @@
+import logging
+import time
+from core.metrics import RequestMetrics, request_metrics
+from core.query_timing import request_scope
+
+logger = logging.getLogger("requests")
+
+# label of requests no route matched, keeps 404 scans from adding
+# one series per path
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status, response size and
+    in-flight requests per route template. Unlike
+    @app.middleware("http") it does not wrap the response in a
+    streaming one or run the endpoint in a separate task.
+    """
+
+    def __init__(
+        self, app, metrics: RequestMetrics = request_metrics
+    ):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_counting(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.in_flight += 1
+        # lets query timing read the route the router matches
+        scope_token = request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send_counting)
+        finally:
+            request_scope.reset(scope_token)
+            self.metrics.in_flight -= 1
+            duration = time.perf_counter() - start
+            # the router stores the matched route in the shared scope
+            route = scope.get("route")
+            self.metrics.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                duration,
+                size,
+            )
+            client = scope.get("client")
+            logger.info(
+                "%s - %s %s -> %d (%.1fms)",
+                client[0] if client else "-",
+                scope["method"],
+                scope["path"],
+                status,
+                duration * 1000,
+            )
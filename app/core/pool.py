@@ -0,0 +1,74 @@
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from core.metrics import PoolMetrics, pool_metrics
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that times how long a checkout waited for a
+    connection and counts checkouts that timed out. SQLAlchemy has
+    no event before a checkout, so _do_get is wrapped instead.
+    """
+
+    metrics: PoolMetrics | None = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.timeouts += 1
+            raise
+        if self.metrics:
+            self.metrics.checkout_wait.observe(
+                time.perf_counter() - start
+            )
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a recreated pool, it keeps the metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def instrument(engine: AsyncEngine, name: str) -> PoolMetrics:
+    """Registers pool event counters of engine under name"""
+    metrics = pool_metrics.setdefault(name, PoolMetrics(name))
+    pool = engine.sync_engine.pool
+    if isinstance(pool, InstrumentedPool):
+        pool.metrics = metrics
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(
+        dbapi_connection, connection_record, connection_proxy
+    ):
+        metrics.checkouts += 1
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.checkins += 1
+
+    @event.listens_for(engine.sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    return metrics
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    """Live gauges of the pool behind engine"""
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),  # type: ignore
+        "checked_out": pool.checkedout(),  # type: ignore
+        "checked_in": pool.checkedin(),  # type: ignore
+        "overflow": pool.overflow(),  # type: ignore
+    }
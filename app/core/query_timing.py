@@ -0,0 +1,137 @@
+import functools
+import inspect
+import logging
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from core.metrics import QueryMetrics
+from core.settings import settings
+
+logger = logging.getLogger("slow_queries")
+
+# set by MetricsMiddleware, the router adds the matched route later
+request_scope: ContextVar[dict | None] = ContextVar(
+    "request_scope", default=None
+)
+# "ExpenseRepository.get_user_expenses" while that method runs
+current_operation: ContextVar[str | None] = ContextVar(
+    "current_operation", default=None
+)
+
+# queries outside a timed repository method, and outside a request
+OTHER_OPERATION = "other"
+BACKGROUND_ROUTE = "background"
+
+query_metrics = QueryMetrics(settings.QUERY_SAMPLES_PER_METHOD)
+
+
+def _timed_coroutine(name: str, method):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        token = current_operation.set(name)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+
+    return wrapper
+
+
+def _timed_generator(name: str, method):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        generator = method(*args, **kwargs)
+        try:
+            while True:
+                # only while the generator runs, not while the
+                # caller handles what it yielded
+                token = current_operation.set(name)
+                try:
+                    item = await generator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    current_operation.reset(token)
+                yield item
+        finally:
+            await generator.aclose()
+
+    return wrapper
+
+
+def timed_queries(cls):
+    """
+    Class decorator, statements run by a public method of cls are
+    counted under "<class>.<method>"
+    """
+    for attribute, method in list(vars(cls).items()):
+        if attribute.startswith("_"):
+            continue
+        name = f"{cls.__name__}.{attribute}"
+        if inspect.isasyncgenfunction(method):
+            setattr(cls, attribute, _timed_generator(name, method))
+        elif inspect.iscoroutinefunction(method):
+            setattr(cls, attribute, _timed_coroutine(name, method))
+    return cls
+
+
+def _current_route() -> str:
+    scope = request_scope.get()
+    if scope is None:
+        return BACKGROUND_ROUTE
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def _shape(value) -> object:
+    """Parameter types without their values, which may be secrets"""
+    if isinstance(value, dict):
+        return {
+            key: type(item).__name__ for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (dict, list, tuple)):
+            return f"{len(value)} x {_shape(value[0])}"
+        return [type(item).__name__ for item in value]
+    return type(value).__name__
+
+
+def instrument_queries(engine: AsyncEngine) -> None:
+    """Times every statement engine runs, see query_metrics"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_execute(
+        connection,
+        cursor,
+        statement,
+        parameters,
+        context,
+        executemany,
+    ):
+        # one execution context per statement, a failed one is dropped
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_execute(
+        connection,
+        cursor,
+        statement,
+        parameters,
+        context,
+        executemany,
+    ):
+        seconds = time.perf_counter() - context.query_started
+        operation = current_operation.get() or OTHER_OPERATION
+        route = _current_route()
+        slow = seconds >= settings.SLOW_QUERY_SECONDS
+        query_metrics.observe(operation, route, seconds, slow)
+        if slow:
+            logger.warning(
+                "%.1fms %s on %s: %s params=%s",
+                seconds * 1000,
+                operation,
+                route,
+                " ".join(statement.split())[:1000],
+                _shape(parameters),
+            )
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from typing import NamedTuple
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool
+from repositories.category_repository import CategoryRepository
+from repositories.currency_repository import CurrencyRepository
+from repositories.reference_data_repository import (
+    ReferenceDataRepository,
+)
+
+logger = logging.getLogger("reference_data")
+
+# notified by the triggers on expenses_category and currency
+REFERENCE_DATA_CHANNEL = "reference_data"
+
+
+class ReferenceMaps(NamedTuple):
+    version: int
+    category_map: dict[str, int]
+    currency_map: dict[str, int]
+
+
+class ReferenceData:
+    """
+    Category and currency maps of this worker. reload() builds new
+    maps and swaps them in with one assignment, so a reader holding
+    maps keeps a consistent pair. watch() reloads on NOTIFY and
+    polls the version row in case a notification was missed.
+    """
+
+    def __init__(self):
+        self.maps = ReferenceMaps(0, {}, {})
+        self._changed = asyncio.Event()
+
+    async def reload(self, async_session: async_sessionmaker) -> None:
+        async with async_session() as session:
+            # version first, maps read after it are never older
+            version = await ReferenceDataRepository(
+                session
+            ).get_version()
+            categories = await CategoryRepository(session).get_all()
+            currencies = await CurrencyRepository(session).get_all()
+        self.maps = ReferenceMaps(
+            version,
+            {c.category_name: c.id for c in categories},
+            {c.code: c.id for c in currencies},
+        )
+        logger.info(f"reference data version {version} loaded")
+
+    async def _current_version(
+        self, async_session: async_sessionmaker
+    ) -> int:
+        async with async_session() as session:
+            return await ReferenceDataRepository(
+                session
+            ).get_version()
+
+    def _notified(self, connection, pid, channel, payload) -> None:
+        self._changed.set()
+
+    async def _listen(self, listen_engine: AsyncEngine) -> None:
+        """
+        Holds one connection with LISTEN until cancelled. Raises
+        once the connection is closed, watch() then listens again.
+        """
+        async with listen_engine.connect() as connection:
+            connection = await connection.execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+            raw = await connection.get_raw_connection()
+            driver = raw.driver_connection
+            closed = asyncio.Event()
+
+            def terminated(_) -> None:
+                closed.set()
+                # poll right away, notifications may have been lost
+                self._changed.set()
+
+            driver.add_termination_listener(  # type: ignore
+                terminated
+            )
+            await driver.add_listener(  # type: ignore
+                REFERENCE_DATA_CHANNEL, self._notified
+            )
+            try:
+                await closed.wait()
+            finally:
+                if not driver.is_closed():  # type: ignore
+                    await driver.remove_listener(  # type: ignore
+                        REFERENCE_DATA_CHANNEL, self._notified
+                    )
+            raise ConnectionError("LISTEN connection closed")
+
+    async def watch(
+        self,
+        engine: AsyncEngine,
+        async_session: async_sessionmaker,
+        poll_seconds: float,
+    ) -> None:
+        # LISTEN holds its connection for good, keep it out of the
+        # pool the requests share
+        listen_engine = create_async_engine(
+            engine.url, poolclass=NullPool
+        )
+        listener = asyncio.create_task(self._listen(listen_engine))
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        self._changed.wait(), poll_seconds
+                    )
+                except TimeoutError:
+                    pass
+                self._changed.clear()
+                if listener.done():
+                    # polling covers the gap, listen again next round
+                    logger.warning(
+                        f"LISTEN stopped: {listener.exception()}"
+                    )
+                    listener = asyncio.create_task(
+                        self._listen(listen_engine)
+                    )
+                try:
+                    version = await self._current_version(
+                        async_session
+                    )
+                    if version != self.maps.version:
+                        await self.reload(async_session)
+                except Exception:
+                    logger.exception("reference data reload failed")
+        finally:
+            listener.cancel()
+            await asyncio.gather(listener, return_exceptions=True)
+            await listen_engine.dispose()
+
+
+reference_data = ReferenceData()
@@ -1,3 +1,4 @@
+from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +8,48 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     LONG_EXPIRE: int
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_STRATEGY: Literal[
+        "round_robin", "least_connections"
+    ] = "round_robin"
+    # how long reads stay on the primary after a client's write
+    READ_YOUR_WRITES_SECONDS: int = 5
+    # per engine and per worker, so multiply by the workers count
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
+    # pick with python -m commands.calibrate_bcrypt
+    BCRYPT_ROUNDS: int = 12
+    HASHING_WORKERS: int = 2
+    HASHING_MAX_PENDING: int = 32
+    BULK_HASHING_PROCESSES: int = 4
+    # chunks queued or running, a bulk signup uses one per process
+    BULK_HASHING_MAX_PENDING: int = 16
+    # admin endpoints answer 403 while this is unset
+    ADMIN_API_KEY: str | None = None
+    # revoked tokens are kept a while, reuse detection needs them
+    TOKEN_PURGE_RETENTION_HOURS: float = 168
+    TOKEN_PURGE_INTERVAL_SECONDS: int = 3600
+    TOKEN_PURGE_BATCH_SIZE: int = 500
+    TOKEN_PURGE_PAUSE_SECONDS: float = 0.05
+    BASE_CURRENCY: str = "USD"
+    # workers of one host share snapshots here for GET /metrics
+    METRICS_DIR: str = "/tmp/expense-tracker-metrics"
+    METRICS_FLUSH_SECONDS: float = 5
+    # statements slower than this are logged with parameter types
+    SLOW_QUERY_SECONDS: float = 0.2
+    # latest durations per repository method kept for percentiles
+    QUERY_SAMPLES_PER_METHOD: int = 1024
+    # fallback when a NOTIFY from the reference data triggers is lost
+    REFERENCE_DATA_POLL_SECONDS: float = 30
+    EXPENSE_CACHE_ENABLED: bool = False
+    EXPENSE_CACHE_MAX_ENTRIES: int = 10000
+    EXPENSE_CACHE_TTL_SECONDS: float = 30
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
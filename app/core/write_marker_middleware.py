@@ -0,0 +1,42 @@
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class WriteMarkerMiddleware:
+    """
+    Pure ASGI middleware: after a successful write it adds the cookie
+    that keeps the client's reads on the primary for max_age seconds.
+    Headers are edited on http.response.start, the body passes
+    through untouched.
+    """
+
+    def __init__(self, app, cookie_name: str, max_age: int):
+        self.app = app
+        # let starlette build the header, same as Response.set_cookie
+        marker = Response()
+        marker.set_cookie(
+            cookie_name,
+            "1",
+            max_age=max_age,
+            httponly=True,
+            samesite="lax",
+        )
+        self.set_cookie = marker.headers["set-cookie"]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marked(message):
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+            ):
+                headers = MutableHeaders(scope=message)
+                headers.append("set-cookie", self.set_cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_marked)
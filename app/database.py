@@ -1,12 +1,38 @@
+import itertools
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from core.settings import settings
+from core.pool import InstrumentedPool, instrument
+from core.query_timing import instrument_queries
+
+# set after a successful write, reads carrying it go to the primary
+WRITE_MARKER_COOKIE = "recent_write"
+READ_PRIMARY_HEADER = "X-Read-Primary"
 
 SQL_ALCHEMY_URL = settings.DATABASE_URL
 
-engine = create_async_engine(
-    url=SQL_ALCHEMY_URL, max_overflow=10, future=True
-)
+
+def make_engine(url: str, name: str):
+    engine = create_async_engine(
+        url=url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        },
+        future=True,
+    )
+    instrument(engine, name)
+    instrument_queries(engine)
+    return engine
+
+
+engine = make_engine(SQL_ALCHEMY_URL, "primary")
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,  # type: ignore
@@ -15,6 +41,26 @@ AsyncSessionLocal = sessionmaker(
 )  # type: ignore
 
 
+def read_only_sessionmaker(bound_engine) -> sessionmaker:
+    """
+    Sessions whose transactions start as BEGIN REPEATABLE READ READ
+    ONLY: all reads of a request, such as the ETag version and the
+    rows, come from one snapshot. A session checks a connection out
+    on its first query, not on creation.
+    """
+    read_only = bound_engine.execution_options(
+        postgresql_readonly=True, isolation_level="REPEATABLE READ"
+    )
+    return sessionmaker(
+        bind=read_only,  # type: ignore
+        class_=AsyncSession,
+        autoflush=False,  # type: ignore
+    )  # type: ignore
+
+
+ReadSessionLocal = read_only_sessionmaker(engine)
+
+
 async def get_db():  # type: ignore
     async with AsyncSessionLocal() as session:  # type: ignore
         try:
@@ -24,3 +70,60 @@ async def get_db():  # type: ignore
             await session.rollback()  # type: ignore
             raise
 
+
+replica_engines = [
+    make_engine(url, f"replica-{index}")
+    for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
+
+ReplicaSessionLocals = [
+    read_only_sessionmaker(replica) for replica in replica_engines
+]
+
+_replica_turns = itertools.count()
+
+
+def pick_replica() -> int:
+    """
+    Index of the replica for the next read. Round-robin, or the one
+    with the fewest checked out connections with round-robin order
+    breaking ties.
+    """
+    start = next(_replica_turns) % len(replica_engines)
+    if settings.DATABASE_REPLICA_STRATEGY == "round_robin":
+        return start
+    order = [
+        (start + step) % len(replica_engines)
+        for step in range(len(replica_engines))
+    ]
+
+    def checked_out(index: int) -> int:
+        pool = replica_engines[index].pool
+        return pool.checkedout()  # type: ignore
+
+    return min(order, key=checked_out)
+
+
+def reads_primary(request: Request) -> bool:
+    """Clients that just wrote read from the primary"""
+    return (
+        not replica_engines
+        or WRITE_MARKER_COOKIE in request.cookies
+        or request.headers.get(READ_PRIMARY_HEADER) == "1"
+    )
+
+
+async def get_read_db(request: Request):  # type: ignore
+    """
+    Read-only session, bound to a replica unless the request must see
+    its own writes. It is never committed, closing it rolls the
+    transaction back and returns the connection. Depend on it with
+    scope="function" to release the connection when the endpoint
+    returns rather than once the response is sent.
+    """
+    if reads_primary(request):
+        session_local = ReadSessionLocal
+    else:
+        session_local = ReplicaSessionLocals[pick_replica()]
+    async with session_local() as session:  # type: ignore
+        yield session
@@ -0,0 +1,20 @@
+import hmac
+from fastapi import Header, HTTPException, status
+from core.settings import settings
+
+
+async def require_admin_key(
+    x_admin_key: str | None = Header(default=None),
+) -> None:
+    """X-Admin-Key must equal ADMIN_API_KEY, which must be set"""
+    if (
+        not settings.ADMIN_API_KEY
+        or not x_admin_key
+        or not hmac.compare_digest(
+            x_admin_key.encode(), settings.ADMIN_API_KEY.encode()
+        )
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin key is missing or wrong",
+        )
@@ -1,37 +1,30 @@
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from services.expense_service import ExpenseService
-from database import get_db
-from repositories.category_repository import CategoryRepository
-from repositories.currency_repository import CurrencyRepository
-from repositories.expense_repository import ExpenseRepository
-
-
-async def get_category_repo(db: AsyncSession = Depends(get_db)):
-    return CategoryRepository(db)
-
-
-async def get_currency_repo(db: AsyncSession = Depends(get_db)):
-    return CurrencyRepository(db)
-
-
-async def get_expense_repo(db: AsyncSession = Depends(get_db)):
-    return ExpenseRepository(db)
+from database import get_db, get_read_db
 
 
 async def get_expense_service(
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    category_repo=Depends(get_category_repo),
-    currency_repo=Depends(get_currency_repo),
-    expense_repo=Depends(get_expense_repo),
-):
-    from main import app
-
-    return ExpenseService(
-        db,
-        category_repo,
-        currency_repo,
-        expense_repo,
-        app.state.currency_map,
-        app.state.category_map,
-    )
+) -> ExpenseService:
+    return request.app.state.container.expense_service(db)
+
+
+async def get_read_expense_service(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db, scope="function"),
+) -> ExpenseService:
+    """
+    Service for read-only endpoints, on a replica if configured. Its
+    connection goes back to the pool as soon as the endpoint returns.
+    """
+    return request.app.state.container.expense_service(db)
+
+
+async def get_stream_expense_service(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+) -> ExpenseService:
+    """Read-only service that lives until a streamed body is sent"""
+    return request.app.state.container.expense_service(db)
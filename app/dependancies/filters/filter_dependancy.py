@@ -0,0 +1,39 @@
+from datetime import date
+from typing import Annotated, Optional
+from fastapi import Depends, Query
+from schemas.schemas import (
+    CategoryName,
+    CurrencyCode,
+    ExpenseFilterParams,
+)
+
+
+async def get_expense_filters(
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    amount_min: Optional[float] = Query(default=None, ge=0),
+    amount_max: Optional[float] = Query(default=None, ge=0),
+    category: list[CategoryName] = Query(
+        default=[], description="Repeat to filter by several"
+    ),
+    currency: list[CurrencyCode] = Query(
+        default=[], description="Repeat to filter by several"
+    ),
+    note_prefix: Optional[str] = Query(
+        default=None, min_length=1, max_length=100
+    ),
+) -> ExpenseFilterParams:
+    return ExpenseFilterParams(
+        date_from=date_from,
+        date_to=date_to,
+        amount_min=amount_min,
+        amount_max=amount_max,
+        categories=category,
+        currencies=currency,
+        note_prefix=note_prefix,
+    )
+
+
+FilterDep = Annotated[
+    ExpenseFilterParams, Depends(get_expense_filters)
+]
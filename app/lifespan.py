@@ -1,9 +1,55 @@
+import asyncio
+import logging
+from datetime import timedelta
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from database import engine
-from repositories.category_repository import CategoryRepository
-from repositories.currency_repository import CurrencyRepository
+from database import engine, replica_engines
+from core.settings import settings
+from core.container import Container
+from core.reference_data import reference_data
+from utility.result_cache import LRUResultCache
+from utility.hashing_pool import HashingPool, ProcessHashingPool
+from utility.prometheus import (
+    archive_snapshot,
+    worker_snapshot,
+    write_snapshot,
+)
+from services.token_purge import purge_tokens_exclusively
+
+logger = logging.getLogger("lifespan")
+
+
+async def purge_tokens_periodically(
+    async_session: async_sessionmaker,
+) -> None:
+    while True:
+        await asyncio.sleep(settings.TOKEN_PURGE_INTERVAL_SECONDS)
+        try:
+            purged = await purge_tokens_exclusively(
+                engine,
+                async_session,
+                timedelta(hours=settings.TOKEN_PURGE_RETENTION_HOURS),
+                settings.TOKEN_PURGE_BATCH_SIZE,
+                settings.TOKEN_PURGE_PAUSE_SECONDS,
+            )
+            if purged is not None:
+                logger.info(f"{purged} refresh tokens purged")
+        except Exception:
+            logger.exception("refresh token purge failed")
+
+
+async def flush_metrics_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+        # snapshot on the loop, the dicts change between awaits
+        snapshot = worker_snapshot()
+        try:
+            await asyncio.to_thread(
+                write_snapshot, settings.METRICS_DIR, snapshot
+            )
+        except OSError:
+            logger.exception("metrics snapshot write failed")
 
 
 @asynccontextmanager
@@ -11,16 +57,48 @@ async def lifespan(app: FastAPI):
     # async with engine.begin() as conn:
     #     await conn.run_sync(Base.metadata.create_all)
     async_session = async_sessionmaker(engine)
-    async with async_session() as session:
-        cat_repo = CategoryRepository(session)
-        cur_repo = CurrencyRepository(session)
-
-        categories = await cat_repo.get_all()
-        currencies = await cur_repo.get_all()
+    await reference_data.reload(async_session)
 
-        app.state.category_map = {
-            c.category_name: c.id for c in categories
-        }
-        app.state.currency_map = {c.code: c.id for c in currencies}
+    expense_cache = None
+    if settings.EXPENSE_CACHE_ENABLED:
+        expense_cache = LRUResultCache(
+            settings.EXPENSE_CACHE_MAX_ENTRIES,
+            settings.EXPENSE_CACHE_TTL_SECONDS,
+        )
+    app.state.container = Container(
+        settings,
+        reference_data,
+        HashingPool(
+            settings.HASHING_WORKERS, settings.HASHING_MAX_PENDING
+        ),
+        ProcessHashingPool(
+            settings.BULK_HASHING_PROCESSES,
+            settings.BULK_HASHING_MAX_PENDING,
+        ),
+        expense_cache,
+    )
+    purge = asyncio.create_task(
+        purge_tokens_periodically(async_session)
+    )
+    watch = asyncio.create_task(
+        reference_data.watch(
+            engine,
+            async_session,
+            settings.REFERENCE_DATA_POLL_SECONDS,
+        )
+    )
+    flush = asyncio.create_task(flush_metrics_periodically())
     yield
+    flush.cancel()
+    try:
+        archive_snapshot(settings.METRICS_DIR, worker_snapshot())
+    except OSError:
+        logger.exception("metrics snapshot archive failed")
+    watch.cancel()
+    purge.cancel()
+    # the watcher closes its LISTEN connection while it stops
+    await asyncio.gather(watch, return_exceptions=True)
+    app.state.container.shutdown()
     await engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
@@ -1,34 +1,46 @@
-import time
 import uvicorn
 import logging
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import users, expenses
+from routers import users, expenses, internal, admin, metrics
 from lifespan import lifespan
+from core.metrics_middleware import MetricsMiddleware
+from core.write_marker_middleware import WriteMarkerMiddleware
+from core.reference_data import reference_data
+from core.settings import settings
+from database import WRITE_MARKER_COOKIE, replica_engines
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
     datefmt="%H:%M:%S",
 )
-logger = logging.getLogger("requests")
 
 app = FastAPI(lifespan=lifespan)
+openapi_version = None
 
 
-@app.middleware("http")
-async def log_request(request: Request, call_next):
-    start = time.time()
-    response = await call_next(request)
-    duration = time.time() - start
-    duration_ms = duration * 1000
-    logger.info(
-        f"{request.client.host} - {request.method} {request.url.path} "
-        f"-> {response.status_code} ({duration_ms:.1f}ms)"
-    )
-    return response
+def openapi() -> dict:
+    """
+    Cached schema, rebuilt after reference data reloads since it
+    lists the allowed categories and currencies
+    """
+    global openapi_version
+    if openapi_version != reference_data.maps.version:
+        app.openapi_schema = None
+        openapi_version = reference_data.maps.version
+    return FastAPI.openapi(app)
+
 
+app.openapi = openapi  # type: ignore
 
+# the cookie only matters when reads can go to a replica
+if replica_engines:
+    app.add_middleware(
+        WriteMarkerMiddleware,  # ty:ignore[invalid-argument-type]
+        cookie_name=WRITE_MARKER_COOKIE,
+        max_age=settings.READ_YOUR_WRITES_SECONDS,
+    )
 app.add_middleware(
     CORSMiddleware,  # ty:ignore[invalid-argument-type]
     allow_origins=["*"],
@@ -36,8 +48,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# added last so it is outermost and times the other middlewares too
+app.add_middleware(MetricsMiddleware)
 app.include_router(users.router)
 app.include_router(expenses.router)
+app.include_router(internal.router)
+app.include_router(admin.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -4,8 +4,18 @@ from sqlalchemy.orm import (
     relationship,
     Mapped,
 )
-from sqlalchemy import Boolean, ForeignKey, String, text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    CheckConstraint,
+    Computed,
+    ForeignKey,
+    Index,
+    SmallInteger,
+    String,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from datetime import datetime, timezone, date
 from sqlalchemy.types import Date, TIMESTAMP
 import uuid
@@ -35,6 +45,10 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=text("now()")
     )
+    # bumped by every expense write, served as the ETag of reads
+    expenses_version: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("0"), nullable=False
+    )
 
     expenses = relationship(
         "Expenses",
@@ -86,15 +100,62 @@ class Expenses(Base):
         ForeignKey("currency.id", ondelete="SET NULL"), nullable=True
     )
     amount: Mapped[float] = mapped_column(nullable=False)
+    # amount in settings.BASE_CURRENCY at expense_date, set on write
+    base_amount: Mapped[float | None] = mapped_column(nullable=True)
     note: Mapped[str] = mapped_column(
         String(500), nullable=True, server_default=""
     )
     expense_date: Mapped[date] = mapped_column(Date)
+    note_tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(note, ''))",
+            persisted=True,
+        ),
+    )
 
     users = relationship("User", back_populates="expenses")
     categories = relationship("Category", back_populates="expenses")
     currencies = relationship("Currency", back_populates="expenses")
 
+    __table_args__ = (
+        Index(
+            "ix_expenses_user_date_id",
+            "user_id",
+            text("expense_date DESC"),
+            text("id DESC"),
+        ),
+        Index(
+            "ix_expenses_user_category_date_id",
+            "user_id",
+            "category_id",
+            text("expense_date DESC"),
+            text("id DESC"),
+        ),
+        Index(
+            "ix_expenses_user_currency_date_id",
+            "user_id",
+            "currency_id",
+            text("expense_date DESC"),
+            text("id DESC"),
+        ),
+        Index("ix_expenses_user_amount", "user_id", "amount"),
+        # composite GIN indexes need the btree_gin extension
+        Index(
+            "ix_expenses_user_note_tsv",
+            "user_id",
+            "note_tsv",
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_expenses_user_note_trgm",
+            "user_id",
+            "note",
+            postgresql_using="gin",
+            postgresql_ops={"note": "gin_trgm_ops"},
+        ),
+    )
+
 
 class Category(Base):
     """
@@ -133,8 +194,87 @@ class Currency(Base):
     expenses = relationship("Expenses", back_populates="currencies")
 
 
+class ExpenseMonthlyRollup(Base):
+    """
+    per user, month, category and currency totals of expenses,
+    maintained by ExpenseRepository on every write. Deleting a
+    category or currency moves its rows to bucket 0 in a trigger,
+    the same as ON DELETE SET NULL does to the expenses.
+    """
+
+    __tablename__ = "expense_monthly_rollup"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("user.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    year: Mapped[int] = mapped_column(primary_key=True)
+    month: Mapped[int] = mapped_column(primary_key=True)
+    category_id: Mapped[int] = mapped_column(primary_key=True)
+    currency_id: Mapped[int] = mapped_column(primary_key=True)
+    total: Mapped[float] = mapped_column(
+        nullable=False, server_default=text("0")
+    )
+    # sum of Expenses.base_amount, in settings.BASE_CURRENCY
+    base_total: Mapped[float] = mapped_column(
+        nullable=False, server_default=text("0")
+    )
+    count: Mapped[int] = mapped_column(
+        nullable=False, server_default=text("0")
+    )
+    # expenses without base_amount, left out of base_total
+    unconverted: Mapped[int] = mapped_column(
+        nullable=False, server_default=text("0")
+    )
+
+
+class ExchangeRate(Base):
+    """
+    rate to convert one unit of from_currency into to_currency,
+    valid from rate_date until the next known date
+    """
+
+    __tablename__ = "exchange_rate"
+
+    rate_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    from_currency_id: Mapped[int] = mapped_column(
+        ForeignKey("currency.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    to_currency_id: Mapped[int] = mapped_column(
+        ForeignKey("currency.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    rate: Mapped[float] = mapped_column(nullable=False)
+
+
+class ReferenceDataVersion(Base):
+    """
+    single row, bumped by triggers whenever categories or currencies
+    change so workers know to reload them
+    """
+
+    __tablename__ = "reference_data_version"
+    __table_args__ = (CheckConstraint("id = 1"),)
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    version: Mapped[int] = mapped_column(
+        BigInteger, server_default="0", nullable=False
+    )
+
+
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # at most one live token per user, see replace_tokens
+        Index(
+            "ix_refresh_tokens_user_active",
+            "user_id",
+            unique=True,
+            postgresql_where=text("revoked_at IS NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -0,0 +1,191 @@
+import uuid
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Sequence,
+)
+from sqlalchemy import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.models import Expenses
+from repositories.expense_repository import IExpenseRepository
+from schemas.schemas import ExpenseFilter, PaginationParams
+from utility.result_cache import IResultCache
+
+
+class CachedExpenseRepository(IExpenseRepository):
+    """
+    Serves the paged and single-row reads of another repository from
+    an IResultCache. Entries are keyed by the user's expenses_version
+    read on this session, every write bumps it in the same
+    transaction, so once a write commits no worker finds the old
+    entries again and they age out. Writes go straight through, reads
+    after a write in this session skip the cache, they may be rolled
+    back.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        repository: IExpenseRepository,
+        cache: IResultCache,
+    ):
+        self._db_session = db
+        self._repository = repository
+        self._cache = cache
+        self._written: set[uuid.UUID] = set()
+        # the version read for the ETag keys this request's reads
+        self._versions: dict[uuid.UUID, int] = {}
+
+    def _wrote(self, user_id: uuid.UUID) -> None:
+        self._written.add(user_id)
+        self._versions.pop(user_id, None)
+
+    async def _cached(
+        self,
+        user_id: uuid.UUID,
+        key: Hashable,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        if user_id in self._written:
+            return await load()
+        # read before the rows, so an entry never holds rows older
+        # than the version it is stored under
+        version = await self.get_expenses_version(user_id)
+        versioned = (version, key)
+        hit, value = self._cache.get(user_id, versioned)
+        if hit:
+            return value
+        generation = self._cache.generation(user_id)
+        value = await load()
+        self._cache.set(user_id, versioned, value, generation)
+        return value
+
+    async def get_user_expenses(
+        self,
+        user_id: uuid.UUID,
+        pagination: PaginationParams,
+        filters: ExpenseFilter | None = None,
+    ):
+        key = (
+            "list",
+            pagination.model_dump_json(),
+            filters.model_dump_json() if filters else None,
+        )
+        return await self._cached(
+            user_id,
+            key,
+            lambda: self._repository.get_user_expenses(
+                user_id, pagination, filters
+            ),
+        )
+
+    async def get_expense_by_id(
+        self, user_id: uuid.UUID, expense_id: int
+    ):
+        return await self._cached(
+            user_id,
+            ("id", expense_id),
+            lambda: self._repository.get_expense_by_id(
+                user_id, expense_id
+            ),
+        )
+
+    async def search_expenses(
+        self,
+        user_id: uuid.UUID,
+        q: str,
+        pagination: PaginationParams,
+    ):
+        key = ("search", q, pagination.model_dump_json())
+        return await self._cached(
+            user_id,
+            key,
+            lambda: self._repository.search_expenses(
+                user_id, q, pagination
+            ),
+        )
+
+    async def get_monthly_summary(
+        self, user_id: uuid.UUID, year: int, month: int | None
+    ):
+        return await self._cached(
+            user_id,
+            ("summary", year, month),
+            lambda: self._repository.get_monthly_summary(
+                user_id, year, month
+            ),
+        )
+
+    async def create_expense(self, expense_data: Expenses):
+        self._wrote(expense_data.user_id)
+        return await self._repository.create_expense(expense_data)
+
+    async def change_expense(
+        self,
+        user_id: uuid.UUID,
+        expense_id: int,
+        new_data: dict,
+    ):
+        self._wrote(user_id)
+        return await self._repository.change_expense(
+            user_id, expense_id, new_data
+        )
+
+    async def delete_expense(self, user_id: uuid.UUID, expense_id):
+        self._wrote(user_id)
+        return await self._repository.delete_expense(
+            user_id, expense_id
+        )
+
+    async def get_expenses_by_ids(
+        self, user_id: uuid.UUID, expense_ids: list[int]
+    ):
+        return await self._repository.get_expenses_by_ids(
+            user_id, expense_ids
+        )
+
+    async def create_expenses(
+        self, user_id: uuid.UUID, rows: list[dict]
+    ) -> list[int]:
+        self._wrote(user_id)
+        return await self._repository.create_expenses(user_id, rows)
+
+    async def change_expenses(
+        self, user_id: uuid.UUID, changes: dict[int, dict]
+    ) -> set[int]:
+        self._wrote(user_id)
+        return await self._repository.change_expenses(
+            user_id, changes
+        )
+
+    async def delete_expenses(
+        self, user_id: uuid.UUID, expense_ids: list[int]
+    ) -> set[int]:
+        self._wrote(user_id)
+        return await self._repository.delete_expenses(
+            user_id, expense_ids
+        )
+
+    async def get_expenses_version(self, user_id: uuid.UUID) -> int:
+        if user_id in self._versions:
+            return self._versions[user_id]
+        version = await self._repository.get_expenses_version(user_id)
+        if user_id not in self._written:
+            self._versions[user_id] = version
+        return version
+
+    def stream_user_expenses(
+        self, user_id: uuid.UUID, batch_size: int
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        return self._repository.stream_user_expenses(
+            user_id, batch_size
+        )
+
+    async def copy_expenses(
+        self, user_id: uuid.UUID, records: list[tuple]
+    ) -> int:
+        self._wrote(user_id)
+        return await self._repository.copy_expenses(user_id, records)
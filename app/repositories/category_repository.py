@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from abc import ABC, abstractmethod
 from sqlalchemy import select
 from models.models import Category
+from core.query_timing import timed_queries
 
 
 class ICategoryRepository(ABC):
@@ -10,6 +11,7 @@ class ICategoryRepository(ABC):
         pass
 
 
+@timed_queries
 class CategoryRepository(ICategoryRepository):
     def __init__(self, db: AsyncSession):
         self._db_session = db
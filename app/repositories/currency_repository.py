@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from models.models import Currency
+from core.query_timing import timed_queries
 
 
 class ICurrencyRepository(ABC):
@@ -10,6 +11,7 @@ class ICurrencyRepository(ABC):
         pass
 
 
+@timed_queries
 class CurrencyRepository:
     def __init__(self, db: AsyncSession):
         self._db_session = db
@@ -1,35 +1,89 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Mapping, Sequence
 import uuid
 from sqlalchemy import (
+    Column,
+    Date,
+    Float,
+    Integer,
+    MetaData,
+    RowMapping,
+    String,
+    Table,
+    and_,
+    case,
+    cast,
+    column,
+    func,
+    insert,
+    literal,
+    null,
+    or_,
     select,
     update,
     extract,
     outerjoin,
     Select,
     delete,
+    tuple_,
+    values,
+)
+from sqlalchemy.orm import aliased
+from sqlalchemy.schema import CreateTable
+from models.models import (
+    Category,
+    Currency,
+    ExchangeRate,
+    Expenses,
+    User,
+)
+from core.query_timing import timed_queries
+from repositories.rollup_repository import (
+    IRollupRepository,
+    RollupRepository,
+    RollupDeltas,
+    add_delta,
 )
-from models.models import Expenses, Category, Currency
 from schemas.schemas import (
+    ExpenseFilter,
+    ExpensePage,
     GetExpenses,
+    GetExpensesList,
     PaginationParams,
     UpdateExpense,
 )
+from utility.cursor import (
+    encode_cursor,
+    decode_cursor,
+    encode_rank_cursor,
+    decode_rank_cursor,
+)
+
+# fields base_amount is computed from, in _base_amount's order
+MONEY_FIELDS = ("amount", "currency_id", "expense_date")
+
+# copy_expenses target, dropped with the transaction that made it
+COPY_STAGING = Table(
+    "expenses_copy",
+    MetaData(),
+    Column("category_id", Integer),
+    Column("currency_id", Integer),
+    Column("amount", Float),
+    Column("note", String),
+    Column("expense_date", Date),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
 
 
 class IExpenseRepository(ABC):
     @abstractmethod
     async def get_user_expenses(
-        self, user_id: uuid.UUID, pagination: PaginationParams
-    ):
-        pass
-
-    @abstractmethod
-    async def get_expense_by_category(
         self,
         user_id: uuid.UUID,
-        category: str,
         pagination: PaginationParams,
+        filters: ExpenseFilter | None = None,
     ):
         pass
 
@@ -39,6 +93,15 @@ class IExpenseRepository(ABC):
     ):
         pass
 
+    @abstractmethod
+    async def search_expenses(
+        self,
+        user_id: uuid.UUID,
+        q: str,
+        pagination: PaginationParams,
+    ):
+        pass
+
     @abstractmethod
     async def create_expense(self, expense_data: Expenses):
         pass
@@ -56,15 +119,69 @@ class IExpenseRepository(ABC):
     async def delete_expense(self, user_id: uuid.UUID, expense_id):
         pass
 
+    @abstractmethod
+    async def get_expenses_by_ids(
+        self, user_id: uuid.UUID, expense_ids: list[int]
+    ) -> dict[int, GetExpenses]:
+        pass
 
+    @abstractmethod
+    async def create_expenses(
+        self, user_id: uuid.UUID, rows: list[dict]
+    ) -> list[int]:
+        pass
+
+    @abstractmethod
+    async def change_expenses(
+        self, user_id: uuid.UUID, changes: dict[int, dict]
+    ) -> set[int]:
+        pass
+
+    @abstractmethod
+    async def delete_expenses(
+        self, user_id: uuid.UUID, expense_ids: list[int]
+    ) -> set[int]:
+        pass
+
+    @abstractmethod
+    def stream_user_expenses(
+        self, user_id: uuid.UUID, batch_size: int
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        pass
+
+    @abstractmethod
+    async def copy_expenses(
+        self, user_id: uuid.UUID, records: list[tuple]
+    ) -> int:
+        pass
+
+    @abstractmethod
+    async def get_monthly_summary(
+        self, user_id: uuid.UUID, year: int, month: int | None
+    ):
+        pass
+
+    @abstractmethod
+    async def get_expenses_version(self, user_id: uuid.UUID) -> int:
+        pass
+
+
+@timed_queries
 class ExpenseRepository(IExpenseRepository):
     """CRUD realization here. Sync methods are for queries, as they do not interfere
     into I/O, so they may be sync. Later, probably, it is better to make another class
     for the queries and use them as some sort of DI.
     """
 
-    def __init__(self, db: AsyncSession):
+    def __init__(
+        self,
+        db: AsyncSession,
+        rollup_repo: IRollupRepository | None = None,
+        base_currency_id: int | None = None,
+    ):
         self._db_session = db
+        self._rollup_repo = rollup_repo or RollupRepository(db)
+        self._base_currency_id = base_currency_id
 
     def get_expense(self) -> Select:
         return select(Expenses)
@@ -82,6 +199,7 @@ class ExpenseRepository(IExpenseRepository):
                     "month"
                 ),
                 extract("day", Expenses.expense_date).label("day"),
+                Expenses.expense_date,
             )
             .join(Expenses.currencies)
             .outerjoin(Expenses.categories)
@@ -90,10 +208,40 @@ class ExpenseRepository(IExpenseRepository):
     def _for_user(self, query: Select, user_id: uuid.UUID) -> Select:
         return query.where(Expenses.user_id == user_id)
 
-    def _by_category_name(
-        self, query: Select, category: str
+    def _filtered(
+        self, query: Select, filters: ExpenseFilter
     ) -> Select:
-        return query.where(Category.category_name == category)
+        """
+        Filters compare integer ids and plain columns of expenses, so
+        together with _for_user they match the (user_id, ...) indexes.
+        """
+        if filters.date_from:
+            query = query.where(
+                Expenses.expense_date >= filters.date_from
+            )
+        if filters.date_to:
+            query = query.where(
+                Expenses.expense_date <= filters.date_to
+            )
+        if filters.amount_min is not None:
+            query = query.where(Expenses.amount >= filters.amount_min)
+        if filters.amount_max is not None:
+            query = query.where(Expenses.amount <= filters.amount_max)
+        if filters.category_ids:
+            query = query.where(
+                Expenses.category_id.in_(filters.category_ids)
+            )
+        if filters.currency_ids:
+            query = query.where(
+                Expenses.currency_id.in_(filters.currency_ids)
+            )
+        if filters.note_prefix:
+            query = query.where(
+                Expenses.note.istartswith(
+                    filters.note_prefix, autoescape=True
+                )
+            )
+        return query
 
     def _by_expense_id_and_user(
         self, query: Select, user_id: uuid.UUID, expense_id: int
@@ -107,23 +255,132 @@ class ExpenseRepository(IExpenseRepository):
     ) -> Select:
         return query.limit(limit).offset(offset)
 
+    def _after_cursor(self, query: Select, cursor: str) -> Select:
+        """Keyset condition matching ix_expenses_user_date_id"""
+        expense_date, expense_id = decode_cursor(cursor)
+        return query.where(
+            tuple_(Expenses.expense_date, Expenses.id)
+            < tuple_(expense_date, expense_id)
+        )
+
     def _ordered_by_date_desc(self, query: Select) -> Select:
-        return query.order_by(Expenses.expense_date.desc())
+        return query.order_by(
+            Expenses.expense_date.desc(), Expenses.id.desc()
+        )
+
+    def _page(
+        self, query: Select, pagination: PaginationParams
+    ) -> Select:
+        """
+        With a cursor the offset is ignored, one extra row is fetched
+        to know whether there is a next page.
+        """
+        query = self._ordered_by_date_desc(query)
+        if pagination.cursor:
+            query = self._after_cursor(query, pagination.cursor)
+            return self._paginated(query, pagination.limit + 1, 0)
+        return self._paginated(
+            query, pagination.limit + 1, pagination.offset
+        )
+
+    def _date_cursor(self, row: RowMapping) -> str:
+        return encode_cursor(row["expense_date"], row["id"])
+
+    async def _fetch_page(
+        self,
+        query: Select,
+        pagination: PaginationParams,
+        make_cursor: Callable[[RowMapping], str] | None = None,
+    ) -> ExpensePage:
+        """Runs a query paged with limit + 1 rows"""
+        make_cursor = make_cursor or self._date_cursor
+        result = await self._db_session.execute(query)
+        rows = result.mappings().all()
+        next_cursor = None
+        if len(rows) > pagination.limit:
+            rows = rows[: pagination.limit]
+            next_cursor = make_cursor(rows[-1])
+        return ExpensePage(
+            items=GetExpensesList.validate_python(rows),
+            next_cursor=next_cursor,
+        )
+
+    def user_expenses_query(
+        self,
+        user_id: uuid.UUID,
+        pagination: PaginationParams,
+        filters: ExpenseFilter | None = None,
+    ) -> Select:
+        """Listing query, also planned by commands.explain_filters"""
+        query = self.base_expense_query()
+        query = self._for_user(query, user_id)
+        if filters:
+            query = self._filtered(query, filters)
+        return self._page(query, pagination)
 
     async def get_user_expenses(
-        self, user_id: uuid.UUID, pagination: PaginationParams
-    ) -> list[GetExpenses]:
+        self,
+        user_id: uuid.UUID,
+        pagination: PaginationParams,
+        filters: ExpenseFilter | None = None,
+    ) -> ExpensePage:
+        query = self.user_expenses_query(user_id, pagination, filters)
+        return await self._fetch_page(query, pagination)
+
+    async def search_expenses(
+        self,
+        user_id: uuid.UUID,
+        q: str,
+        pagination: PaginationParams,
+    ) -> ExpensePage:
+        """
+        Full-text match on note_tsv or trigram match on note, ranked
+        by ts_rank + word_similarity. Both conditions are served by
+        the (user_id, ...) GIN indexes.
+        """
+        tsquery = func.websearch_to_tsquery("simple", q)
+        rank = func.ts_rank(
+            Expenses.note_tsv, tsquery
+        ) + func.word_similarity(q, Expenses.note)
+        query = self.base_expense_query()
+        query = query.add_columns(rank.label("rank"))
+        query = self._for_user(query, user_id)
+        query = query.where(
+            or_(
+                Expenses.note_tsv.op("@@")(tsquery),
+                literal(q).op("<%")(Expenses.note),
+                Expenses.note.icontains(q, autoescape=True),
+            )
+        )
+        offset = pagination.offset
+        if pagination.cursor:
+            last_rank, last_id = decode_rank_cursor(pagination.cursor)
+            query = query.where(
+                tuple_(rank, Expenses.id) < tuple_(last_rank, last_id)
+            )
+            offset = 0
+        query = query.order_by(rank.desc(), Expenses.id.desc())
+        query = self._paginated(query, pagination.limit + 1, offset)
+        return await self._fetch_page(
+            query,
+            pagination,
+            lambda row: encode_rank_cursor(row["rank"], row["id"]),
+        )
+
+    async def stream_user_expenses(
+        self, user_id: uuid.UUID, batch_size: int
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        """Whole history through a server-side cursor, in batches"""
         query = self.base_expense_query()
         query = self._for_user(query, user_id)
         query = self._ordered_by_date_desc(query)
-        query = self._paginated(
-            query, pagination.limit, pagination.offset
+        result = await self._db_session.stream(
+            query.execution_options(yield_per=batch_size)
         )
-        result = await self._db_session.execute(query)
-        rows = result.mappings().all()
-        if not rows:
-            return []
-        return [GetExpenses.model_validate(row) for row in rows]
+        async for partition in result.mappings().partitions(
+            batch_size
+        ):
+            yield partition
 
     async def get_expense_by_id(
         self, user_id: uuid.UUID, expense_id: int
@@ -135,61 +392,484 @@ class ExpenseRepository(IExpenseRepository):
         row = result.mappings().first()
         return GetExpenses.model_validate(row) if row else None
 
-    async def get_expense_by_category(
+    def _rollup_columns(self) -> tuple:
+        return (
+            Expenses.expense_date,
+            Expenses.category_id,
+            Expenses.currency_id,
+            Expenses.amount,
+            Expenses.base_amount,
+        )
+
+    def _old_rollup_columns(self, old) -> tuple:
+        """Rollup columns of the pre-update alias, prefixed old_"""
+        return tuple(
+            getattr(old, column.key).label(f"old_{column.key}")
+            for column in self._rollup_columns()
+        )
+
+    def _add_row_delta(
         self,
+        deltas: RollupDeltas,
         user_id: uuid.UUID,
-        category: str,
-        pagination: PaginationParams,
-    ) -> list[GetExpenses]:
-        query = self.base_expense_query()
-        query = self._for_user(query, user_id)
-        query = self._by_category_name(query, category)
-        query = self._ordered_by_date_desc(query)
-        query = self._paginated(
-            query, pagination.limit, pagination.offset
+        row: Mapping,
+        sign: int,
+        prefix: str = "",
+    ) -> None:
+        base_amount = row[f"{prefix}base_amount"]
+        add_delta(
+            deltas,
+            user_id,
+            row[f"{prefix}expense_date"],
+            row[f"{prefix}category_id"],
+            row[f"{prefix}currency_id"],
+            sign * row[f"{prefix}amount"],
+            None if base_amount is None else sign * base_amount,
+            sign,
         )
-        result = await self._db_session.execute(query)
-        rows = result.mappings().all()
-        if not rows:
-            return []
-        return [GetExpenses.model_validate(row) for row in rows]
 
-    async def create_expense(self, expense_data: Expenses):
-        self._db_session.add(expense_data)
-        await self._db_session.flush()
+    async def _bump_version(self, user_id: uuid.UUID) -> None:
+        """
+        Every write moves the user's expenses_version forward. Called
+        before the write, the user row lock it takes serializes the
+        writes of one user, so the write statement's snapshot already
+        holds the rows a concurrent write committed.
+        """
+        await self._db_session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(expenses_version=User.expenses_version + 1)
+        )
 
-        query = self.base_expense_query().where(
-            Expenses.id == expense_data.id
+    async def _lock_user(self, user_id: uuid.UUID) -> None:
+        """
+        The user row lock of _bump_version without the bump, for
+        writes that may match no row. They bump after the write,
+        only when it changed something.
+        """
+        await self._db_session.execute(
+            select(User.id)
+            .where(User.id == user_id)
+            .with_for_update()
         )
-        result = await self._db_session.execute(query)
-        row = result.mappings().first()
+
+    def _new_or_stored(self, new_data: dict, name: str):
+        if name not in new_data:
+            return getattr(Expenses, name)
+        column_type = Expenses.__table__.c[name].type
+        return literal(new_data[name], column_type)
+
+    def _base_amount(self, amount, currency_id, expense_date):
+        """
+        SQL for base_amount from the stored rates: the latest rate
+        on or before the date, a direct rate before an inverted one.
+        NULL when none is known. Every write path uses it, so
+        creates and updates convert with the same rates.
+        """
+        base = self._base_currency_id
+        if base is None:
+            return null()
+        direct = ExchangeRate.to_currency_id == base
+        rate = (
+            select(
+                case(
+                    (direct, ExchangeRate.rate),
+                    else_=literal(1.0) / ExchangeRate.rate,
+                )
+            )
+            .where(
+                ExchangeRate.rate_date <= expense_date,
+                or_(
+                    and_(
+                        ExchangeRate.from_currency_id == currency_id,
+                        direct,
+                    ),
+                    and_(
+                        ExchangeRate.from_currency_id == base,
+                        ExchangeRate.to_currency_id == currency_id,
+                        ExchangeRate.rate != 0,
+                    ),
+                ),
+            )
+            .order_by(ExchangeRate.rate_date.desc(), direct.desc())
+            .limit(1)
+            .correlate_except(ExchangeRate)
+            .scalar_subquery()
+        )
+        return amount * case((currency_id == base, 1.0), else_=rate)
+
+    def _written_columns(self) -> tuple:
+        """_rollup_columns already carries amount"""
+        return (
+            Expenses.id,
+            Expenses.note,
+            *self._rollup_columns(),
+        )
+
+    def _from_written(self, written) -> Select:
+        """
+        Response row built from a data-modifying CTE, names are joined
+        in the same statement instead of a second SELECT.
+        """
+        return (
+            select(
+                written.c.id,
+                Category.category_name,
+                written.c.amount,
+                Currency.symbol.label("currency_code"),
+                written.c.note,
+                extract("year", written.c.expense_date).label("year"),
+                extract("month", written.c.expense_date).label(
+                    "month"
+                ),
+                extract("day", written.c.expense_date).label("day"),
+                written.c.expense_date,
+                written.c.category_id,
+                written.c.currency_id,
+                written.c.base_amount,
+            )
+            .select_from(written)
+            .join(Currency, Currency.id == written.c.currency_id)
+            .outerjoin(Category, Category.id == written.c.category_id)
+        )
+
+    async def create_expense(self, expense_data: Expenses):
+        money = {
+            name: getattr(expense_data, name) for name in MONEY_FIELDS
+        }
+        written = (
+            insert(Expenses)
+            .values(
+                user_id=expense_data.user_id,
+                category_id=expense_data.category_id,
+                currency_id=expense_data.currency_id,
+                amount=expense_data.amount,
+                base_amount=self._base_amount(
+                    *(
+                        self._new_or_stored(money, name)
+                        for name in MONEY_FIELDS
+                    )
+                ),
+                note=expense_data.note,
+                expense_date=expense_data.expense_date,
+            )
+            .returning(*self._written_columns())
+            .cte("written")
+        )
+        await self._bump_version(expense_data.user_id)
+        result = await self._db_session.execute(
+            self._from_written(written)
+        )
+        row = result.mappings().one()
+
+        deltas: RollupDeltas = {}
+        self._add_row_delta(deltas, expense_data.user_id, row, 1)
+        await self._rollup_repo.apply_deltas(deltas)
         return row
 
     async def delete_expense(
         self, user_id: uuid.UUID, expense_id: int
     ):
-        query = delete(Expenses).where(
-            Expenses.id == expense_id, Expenses.user_id == user_id
+        query = (
+            delete(Expenses)
+            .where(
+                Expenses.id == expense_id, Expenses.user_id == user_id
+            )
+            .returning(*self._rollup_columns())
         )
+        await self._lock_user(user_id)
         result = await self._db_session.execute(query)
-        return result.rowcount > 0
+        old = result.first()
+        if not old:
+            return False
+        await self._bump_version(user_id)
+        deltas: RollupDeltas = {}
+        self._add_row_delta(deltas, user_id, old._mapping, -1)
+        await self._rollup_repo.apply_deltas(deltas)
+        return True
 
     async def change_expense(
         self,
         user_id: uuid.UUID,
         expense_id: int,
         new_data: dict,
-    ) -> bool:
+    ):
         """
-        Returns True if row was found and updated
-        Returns False otherwise
+        Returns the updated response row if it was found
+        Returns None otherwise
         """
-        query = (
+        # the self join reads the row from the statement snapshot,
+        # which is current only because _lock_user locked the user
+        await self._lock_user(user_id)
+        if new_data.keys() & MONEY_FIELDS:
+            # in the UPDATE itself, no read of the stored fields first
+            new_data["base_amount"] = self._base_amount(
+                *(
+                    self._new_or_stored(new_data, name)
+                    for name in MONEY_FIELDS
+                )
+            )
+        old = aliased(Expenses, name="old")
+        written = (
             update(Expenses)
             .values(**new_data)
             .where(
-                Expenses.user_id == user_id, Expenses.id == expense_id
+                Expenses.user_id == user_id,
+                Expenses.id == expense_id,
+                old.id == Expenses.id,
+            )
+            .returning(
+                *self._written_columns(),
+                *self._old_rollup_columns(old),
+            )
+            .cte("written")
+        )
+        query = self._from_written(written).add_columns(
+            *(
+                written.c[f"old_{column.key}"]
+                for column in self._rollup_columns()
             )
         )
         result = await self._db_session.execute(query)
-        return result.rowcount
+        row = result.mappings().first()
+        if not row:
+            return None
+        await self._bump_version(user_id)
+        deltas: RollupDeltas = {}
+        self._add_row_delta(deltas, user_id, row, -1, prefix="old_")
+        self._add_row_delta(deltas, user_id, row, 1)
+        await self._rollup_repo.apply_deltas(deltas)
+        return row
+
+    async def get_expenses_by_ids(
+        self, user_id: uuid.UUID, expense_ids: list[int]
+    ) -> dict[int, GetExpenses]:
+        if not expense_ids:
+            return {}
+        query = self.base_expense_query()
+        query = self._for_user(query, user_id)
+        query = query.where(Expenses.id.in_(expense_ids))
+        result = await self._db_session.execute(query)
+        return {
+            row["id"]: GetExpenses.model_validate(row)
+            for row in result.mappings().all()
+        }
+
+    async def create_expenses(
+        self, user_id: uuid.UUID, rows: list[dict]
+    ) -> list[int]:
+        """
+        Multi-row INSERT ... RETURNING, ids come back in the order
+        of rows. base_amount is set by one UPDATE of the new rows
+        after it, the multi-row VALUES only takes per-row params.
+        """
+        if not rows:
+            return []
+        query = insert(Expenses).returning(
+            Expenses.id, sort_by_parameter_order=True
+        )
+        await self._bump_version(user_id)
+        result = await self._db_session.execute(
+            query, [{"user_id": user_id, **row} for row in rows]
+        )
+        created = list(result.scalars().all())
+        result = await self._db_session.execute(
+            update(Expenses)
+            .where(Expenses.id.in_(created))
+            .values(
+                base_amount=self._base_amount(
+                    *(
+                        getattr(Expenses, name)
+                        for name in MONEY_FIELDS
+                    )
+                )
+            )
+            .returning(*self._rollup_columns())
+            .execution_options(synchronize_session=False)
+        )
+        deltas: RollupDeltas = {}
+        for row in result.all():
+            self._add_row_delta(deltas, user_id, row._mapping, 1)
+        await self._rollup_repo.apply_deltas(deltas)
+        return created
+
+    async def change_expenses(
+        self, user_id: uuid.UUID, changes: dict[int, dict]
+    ) -> set[int]:
+        """
+        One UPDATE ... FROM (VALUES ...) for all changes. Columns
+        missing from a change keep their value, so a column can not
+        be set to NULL here. base_amount is recomputed in the same
+        statement when a money field changes, NULL when no rate is
+        known. Returns ids that were found and updated.
+        """
+        if not changes:
+            return set()
+        changed = values(
+            column("id", Integer),
+            column("category_id", Integer),
+            column("currency_id", Integer),
+            column("amount", Float),
+            column("note", String),
+            column("expense_date", Date),
+            name="changes",
+        ).data(
+            [
+                (
+                    expense_id,
+                    data.get("category_id"),
+                    data.get("currency_id"),
+                    data.get("amount"),
+                    data.get("note"),
+                    data.get("expense_date"),
+                )
+                for expense_id, data in changes.items()
+            ]
+        )
+        # the self join reads the rows from the statement snapshot,
+        # which is current only because _lock_user locked the user
+        await self._lock_user(user_id)
+        old = aliased(Expenses, name="old")
+        # a VALUES column that is NULL in every row is typed text
+        merged = {
+            name: func.coalesce(
+                cast(changed.c[name], getattr(Expenses, name).type),
+                getattr(Expenses, name),
+            )
+            for name in (
+                "category_id",
+                "currency_id",
+                "amount",
+                "note",
+                "expense_date",
+            )
+        }
+        unchanged_money = and_(
+            *(changed.c[name].is_(None) for name in MONEY_FIELDS)
+        )
+        query = (
+            update(Expenses)
+            .where(
+                Expenses.id == changed.c.id,
+                Expenses.user_id == user_id,
+                old.id == Expenses.id,
+            )
+            .values(
+                {
+                    **merged,
+                    "base_amount": case(
+                        (unchanged_money, Expenses.base_amount),
+                        else_=self._base_amount(
+                            *(merged[name] for name in MONEY_FIELDS)
+                        ),
+                    ),
+                }
+            )
+            .returning(
+                Expenses.id,
+                *self._rollup_columns(),
+                *self._old_rollup_columns(old),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await self._db_session.execute(query)
+        deltas: RollupDeltas = {}
+        updated: set[int] = set()
+        for row in result.all():
+            updated.add(row.id)
+            self._add_row_delta(
+                deltas, user_id, row._mapping, -1, prefix="old_"
+            )
+            self._add_row_delta(deltas, user_id, row._mapping, 1)
+        if updated:
+            await self._bump_version(user_id)
+        await self._rollup_repo.apply_deltas(deltas)
+        return updated
+
+    async def delete_expenses(
+        self, user_id: uuid.UUID, expense_ids: list[int]
+    ) -> set[int]:
+        if not expense_ids:
+            return set()
+        query = (
+            delete(Expenses)
+            .where(
+                Expenses.user_id == user_id,
+                Expenses.id.in_(expense_ids),
+            )
+            .returning(Expenses.id, *self._rollup_columns())
+        )
+        await self._lock_user(user_id)
+        result = await self._db_session.execute(query)
+        deltas: RollupDeltas = {}
+        deleted: set[int] = set()
+        for row in result.all():
+            deleted.add(row.id)
+            self._add_row_delta(deltas, user_id, row._mapping, -1)
+        if deleted:
+            await self._bump_version(user_id)
+        await self._rollup_repo.apply_deltas(deltas)
+        return deleted
+
+    async def copy_expenses(
+        self, user_id: uuid.UUID, records: list[tuple]
+    ) -> int:
+        """
+        Bulk insert through asyncpg COPY. Records are tuples of
+        (category_id, currency_id, amount, note, expense_date). COPY
+        goes to a temporary staging table, one INSERT ... SELECT
+        moves the rows to expenses and computes base_amount there.
+        """
+        if not records:
+            return 0
+        # the asyncpg adapter begins its transaction on the first
+        # statement, this one, so COPY runs inside it and is rolled
+        # back with the rest
+        await self._bump_version(user_id)
+        await self._db_session.execute(
+            CreateTable(COPY_STAGING, if_not_exists=True)
+        )
+        connection = await self._db_session.connection()
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection
+        await driver.copy_records_to_table(  # type: ignore
+            COPY_STAGING.name,
+            records=records,
+            columns=[column.key for column in COPY_STAGING.c],
+        )
+        staged = COPY_STAGING.c
+        query = (
+            insert(Expenses)
+            .from_select(
+                ["user_id", *staged.keys(), "base_amount"],
+                select(
+                    literal(user_id, Expenses.user_id.type),
+                    *staged,
+                    self._base_amount(
+                        *(staged[name] for name in MONEY_FIELDS)
+                    ),
+                ),
+            )
+            .returning(*self._rollup_columns())
+        )
+        result = await self._db_session.execute(query)
+        deltas: RollupDeltas = {}
+        for row in result.all():
+            self._add_row_delta(deltas, user_id, row._mapping, 1)
+        # the table lives until commit, a later chunk reuses it
+        await self._db_session.execute(delete(COPY_STAGING))
+        await self._rollup_repo.apply_deltas(deltas)
+        return len(records)
+
+    async def get_monthly_summary(
+        self, user_id: uuid.UUID, year: int, month: int | None
+    ):
+        return await self._rollup_repo.get_monthly_summary(
+            user_id, year, month
+        )
+
+    async def get_expenses_version(self, user_id: uuid.UUID) -> int:
+        query = select(User.expenses_version)
+        query = query.where(User.id == user_id)
+        result = await self._db_session.execute(query)
+        return result.scalar_one_or_none() or 0
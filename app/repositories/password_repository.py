@@ -1,27 +1,83 @@
 from abc import ABC, abstractmethod
 import hashlib
 import bcrypt
+from utility.hashing_pool import HashingPool, ProcessHashingPool
 
 
 class IPasswordHasher(ABC):
     @abstractmethod
-    def hash_password(self, password: str) -> str:
+    async def hash_password(self, password: str) -> str:
         pass
 
     @abstractmethod
-    def verify_password(
+    async def verify_password(
         self, password: str, db_password: str
     ) -> bool:
         pass
 
+    @abstractmethod
+    async def hash_passwords(self, passwords: list[str]) -> list[str]:
+        pass
+
+    @abstractmethod
+    def needs_rehash(self, db_password: str) -> bool:
+        pass
+
+
+def bcrypt_hash(password: str, rounds: int) -> str:
+    sha = hashlib.sha256(password.encode()).digest()
+    return bcrypt.hashpw(sha, bcrypt.gensalt(rounds)).decode()
+
+
+def bcrypt_hash_many(passwords: list[str], rounds: int) -> list[str]:
+    return [bcrypt_hash(password, rounds) for password in passwords]
+
+
+def bcrypt_verify(password: str, db_password: str) -> bool:
+    sha = hashlib.sha256(password.encode()).digest()
+    return bcrypt.checkpw(sha, db_password.encode())
+
 
 class PasswordHasher(IPasswordHasher):
-    def hash_password(self, password: str) -> str:
-        sha = hashlib.sha256(password.encode()).digest()
-        return bcrypt.hashpw(sha, bcrypt.gensalt()).decode()
+    """bcrypt over sha256 of the password, hashed in a HashingPool"""
 
-    def verify_password(
+    def __init__(
+        self,
+        pool: HashingPool,
+        rounds: int,
+        bulk_pool: ProcessHashingPool | None = None,
+    ):
+        self._pool = pool
+        self._bulk_pool = bulk_pool
+        self.rounds = rounds
+
+    async def hash_password(self, password: str) -> str:
+        return await self._pool.run(
+            bcrypt_hash, password, self.rounds
+        )
+
+    async def verify_password(
         self, password: str, db_password: str
     ) -> bool:
-        sha = hashlib.sha256(password.encode()).digest()
-        return bcrypt.checkpw(sha, db_password.encode())
+        return await self._pool.run(
+            bcrypt_verify, password, db_password
+        )
+
+    async def hash_passwords(self, passwords: list[str]) -> list[str]:
+        """Hashes of a batch, in order, spread over the bulk pool"""
+        if self._bulk_pool is None:
+            return [
+                await self.hash_password(password)
+                for password in passwords
+            ]
+        return await self._bulk_pool.map_chunks(
+            bcrypt_hash_many, passwords, self.rounds
+        )
+
+    def needs_rehash(self, db_password: str) -> bool:
+        """True when the stored hash is not of the current cost"""
+        # $2b$<rounds>$<salt and hash>
+        parts = db_password.split("$")
+        if len(parts) != 4 or not parts[2].isdigit():
+            return True
+        return int(parts[2]) != self.rounds
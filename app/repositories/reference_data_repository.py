@@ -0,0 +1,23 @@
+from abc import ABC, abstractmethod
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.models import ReferenceDataVersion
+from core.query_timing import timed_queries
+
+
+class IReferenceDataRepository(ABC):
+    @abstractmethod
+    async def get_version(self) -> int:
+        pass
+
+
+@timed_queries
+class ReferenceDataRepository(IReferenceDataRepository):
+    def __init__(self, db: AsyncSession):
+        self._db_session = db
+
+    async def get_version(self) -> int:
+        result = await self._db_session.execute(
+            select(ReferenceDataVersion.version)
+        )
+        return result.scalar_one_or_none() or 0
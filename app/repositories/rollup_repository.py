@@ -0,0 +1,230 @@
+from abc import ABC, abstractmethod
+from datetime import date
+import uuid
+from sqlalchemy import (
+    delete,
+    extract,
+    func,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.models import Expenses, ExpenseMonthlyRollup, User
+from core.query_timing import timed_queries
+
+# (user_id, year, month, category_id, currency_id)
+RollupKey = tuple[uuid.UUID, int, int, int, int]
+# (total, base_total, count, unconverted)
+RollupDeltas = dict[RollupKey, tuple[float, float, int, int]]
+
+ROLLUP_KEY_COLUMNS = (
+    "user_id",
+    "year",
+    "month",
+    "category_id",
+    "currency_id",
+)
+ROLLUP_SUM_COLUMNS = ("total", "base_total", "count", "unconverted")
+
+
+def add_delta(
+    deltas: RollupDeltas,
+    user_id: uuid.UUID,
+    expense_date: date,
+    category_id: int | None,
+    currency_id: int | None,
+    amount: float,
+    base_amount: float | None,
+    count: int,
+) -> None:
+    """
+    Accumulates a change of one expense row into deltas. Rows without
+    category or currency are rolled up under id 0. Rows without
+    base_amount are left out of base_total and counted as
+    unconverted instead.
+    """
+    key: RollupKey = (
+        user_id,
+        expense_date.year,
+        expense_date.month,
+        category_id or 0,
+        currency_id or 0,
+    )
+    total, base_total, rows, unconverted = deltas.get(
+        key, (0.0, 0.0, 0, 0)
+    )
+    deltas[key] = (
+        total + amount,
+        base_total + (base_amount or 0),
+        rows + count,
+        unconverted + (count if base_amount is None else 0),
+    )
+
+
+class IRollupRepository(ABC):
+    @abstractmethod
+    async def apply_deltas(self, deltas: RollupDeltas) -> None:
+        pass
+
+    @abstractmethod
+    async def get_monthly_summary(
+        self, user_id: uuid.UUID, year: int, month: int | None
+    ):
+        pass
+
+    @abstractmethod
+    async def get_user_ids_batch(
+        self, after: uuid.UUID | None, limit: int
+    ) -> list[uuid.UUID]:
+        pass
+
+    @abstractmethod
+    async def rebuild_for_users(
+        self, user_ids: list[uuid.UUID]
+    ) -> int:
+        pass
+
+
+@timed_queries
+class RollupRepository(IRollupRepository):
+    def __init__(self, db: AsyncSession):
+        self._db_session = db
+
+    async def apply_deltas(self, deltas: RollupDeltas) -> None:
+        """One upsert for all keys, keys are unique within deltas"""
+        if not deltas:
+            return
+        rows = [
+            dict(zip(ROLLUP_KEY_COLUMNS, key))
+            | dict(zip(ROLLUP_SUM_COLUMNS, delta))
+            for key, delta in deltas.items()
+        ]
+        query = pg_insert(ExpenseMonthlyRollup).values(rows)
+        query = query.on_conflict_do_update(
+            index_elements=[
+                ExpenseMonthlyRollup.user_id,
+                ExpenseMonthlyRollup.year,
+                ExpenseMonthlyRollup.month,
+                ExpenseMonthlyRollup.category_id,
+                ExpenseMonthlyRollup.currency_id,
+            ],
+            set_={
+                "total": ExpenseMonthlyRollup.total
+                + query.excluded.total,
+                "base_total": ExpenseMonthlyRollup.base_total
+                + query.excluded.base_total,
+                "count": ExpenseMonthlyRollup.count
+                + query.excluded.count,
+                "unconverted": ExpenseMonthlyRollup.unconverted
+                + query.excluded.unconverted,
+            },
+        )
+        await self._db_session.execute(query)
+
+    async def get_monthly_summary(
+        self, user_id: uuid.UUID, year: int, month: int | None
+    ):
+        query = select(
+            ExpenseMonthlyRollup.year,
+            ExpenseMonthlyRollup.month,
+            ExpenseMonthlyRollup.category_id,
+            ExpenseMonthlyRollup.currency_id,
+            ExpenseMonthlyRollup.total,
+            ExpenseMonthlyRollup.base_total,
+            ExpenseMonthlyRollup.count,
+            ExpenseMonthlyRollup.unconverted,
+        ).where(
+            ExpenseMonthlyRollup.user_id == user_id,
+            ExpenseMonthlyRollup.year == year,
+            ExpenseMonthlyRollup.count > 0,
+        )
+        if month is not None:
+            query = query.where(ExpenseMonthlyRollup.month == month)
+        query = query.order_by(
+            ExpenseMonthlyRollup.month,
+            ExpenseMonthlyRollup.category_id,
+            ExpenseMonthlyRollup.currency_id,
+        )
+        result = await self._db_session.execute(query)
+        return result.mappings().all()
+
+    async def get_user_ids_batch(
+        self, after: uuid.UUID | None, limit: int
+    ) -> list[uuid.UUID]:
+        query = select(Expenses.user_id).distinct()
+        if after is not None:
+            query = query.where(Expenses.user_id > after)
+        query = query.order_by(Expenses.user_id).limit(limit)
+        result = await self._db_session.execute(query)
+        return list(result.scalars().all())
+
+    async def rebuild_for_users(
+        self, user_ids: list[uuid.UUID]
+    ) -> int:
+        """
+        Recomputes rollup rows of the given users from expenses.
+        The user rows are locked first, the lock every expense
+        write takes, so no write lands between the DELETE and the
+        INSERT. Their expenses_version is bumped like on a write.
+        """
+        # id order, two rebuilds lock overlapping users the same way
+        await self._db_session.execute(
+            select(User.id)
+            .where(User.id.in_(user_ids))
+            .order_by(User.id)
+            .with_for_update()
+        )
+        await self._db_session.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(expenses_version=User.expenses_version + 1)
+        )
+        await self._db_session.execute(
+            delete(ExpenseMonthlyRollup).where(
+                ExpenseMonthlyRollup.user_id.in_(user_ids)
+            )
+        )
+        year = extract("year", Expenses.expense_date)
+        month = extract("month", Expenses.expense_date)
+        category_id = func.coalesce(Expenses.category_id, 0)
+        currency_id = func.coalesce(Expenses.currency_id, 0)
+        aggregated = (
+            select(
+                Expenses.user_id,
+                year,
+                month,
+                category_id,
+                currency_id,
+                func.sum(Expenses.amount),
+                func.coalesce(func.sum(Expenses.base_amount), 0),
+                func.count(),
+                func.count().filter(Expenses.base_amount.is_(None)),
+            )
+            .where(Expenses.user_id.in_(user_ids))
+            .group_by(
+                Expenses.user_id,
+                year,
+                month,
+                category_id,
+                currency_id,
+            )
+        )
+        result = await self._db_session.execute(
+            insert(ExpenseMonthlyRollup).from_select(
+                [
+                    "user_id",
+                    "year",
+                    "month",
+                    "category_id",
+                    "currency_id",
+                    "total",
+                    "base_total",
+                    "count",
+                    "unconverted",
+                ],
+                aggregated,
+            )
+        )
+        return result.rowcount
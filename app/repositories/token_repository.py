@@ -1,10 +1,22 @@
 from abc import ABC, abstractmethod
 from uuid import UUID
-from sqlalchemy import update
+import uuid
+from sqlalchemy import (
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 from utility.hash_token import hash_refresh_token
 from models.models import RefreshToken
+from core.query_timing import timed_queries
+from core.errors import ConcurrentLoginError
 
 
 class ITokenRepository(ABC):
@@ -18,7 +30,34 @@ class ITokenRepository(ABC):
     async def revoke_token(self, user_id: UUID):
         pass
 
+    @abstractmethod
+    async def replace_tokens(
+        self, user_id: UUID, token: str, expires_at: datetime
+    ) -> None:
+        pass
+
+    @abstractmethod
+    async def rotate(
+        self,
+        user_id: UUID,
+        old_token: str,
+        new_token: str,
+        expires_at: datetime,
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    async def is_revoked(self, token: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def purge_batch(
+        self, cutoff: datetime, after: UUID | None, limit: int
+    ) -> list[UUID]:
+        pass
+
 
+@timed_queries
 class TokenRepository(ITokenRepository):
     def __init__(self, db: AsyncSession):
         self._db_session = db
@@ -44,3 +83,136 @@ class TokenRepository(ITokenRepository):
             .values(revoked_at=datetime.now(timezone.utc))
         )
         await self._db_session.flush()
+
+    async def _in_savepoint(self, query):
+        """
+        Runs query in a savepoint. A unique violation on the one
+        active token per user index leaves the transaction usable
+        and is raised as ConcurrentLoginError.
+        """
+        try:
+            async with self._db_session.begin_nested():
+                return await self._db_session.execute(query)
+        except IntegrityError as e:
+            raise ConcurrentLoginError(
+                "Another login of the user committed first"
+            ) from e
+
+    async def replace_tokens(
+        self, user_id: UUID, token: str, expires_at: datetime
+    ) -> None:
+        """
+        Revokes every live token of the user and stores the new one
+        in one statement. The insert selects from the revoking CTE,
+        so the revocation runs first. A login racing this one is
+        caught by the partial unique index, the statement is then
+        retried once on a fresh snapshot that sees its token.
+        """
+        revoked = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.user_id == user_id,
+                RefreshToken.revoked_at.is_(None),
+            )
+            .values(revoked_at=func.now())
+            .returning(RefreshToken.id)
+            .cte("revoked")
+        )
+        query = insert(RefreshToken).from_select(
+            ["id", "user_id", "token", "expires_at"],
+            select(
+                literal(uuid.uuid4(), RefreshToken.id.type),
+                literal(user_id, RefreshToken.user_id.type),
+                literal(
+                    hash_refresh_token(token), RefreshToken.token.type
+                ),
+                literal(expires_at, RefreshToken.expires_at.type),
+            ).select_from(
+                select(func.count()).select_from(revoked).subquery()
+            ),
+        )
+        try:
+            await self._in_savepoint(query)
+        except ConcurrentLoginError:
+            await self._in_savepoint(query)
+
+    async def rotate(
+        self,
+        user_id: UUID,
+        old_token: str,
+        new_token: str,
+        expires_at: datetime,
+    ) -> bool:
+        """
+        Revokes old_token and stores new_token in one statement. The
+        old one is found through the unique token index and must be
+        live and owned by user_id. False when nothing was rotated.
+        """
+        revoked = (
+            update(RefreshToken)
+            .where(
+                RefreshToken.token == hash_refresh_token(old_token),
+                RefreshToken.user_id == user_id,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > func.now(),
+            )
+            .values(revoked_at=func.now())
+            .returning(RefreshToken.user_id)
+            .cte("revoked")
+        )
+        query = (
+            insert(RefreshToken)
+            .from_select(
+                ["id", "user_id", "token", "expires_at"],
+                select(
+                    literal(uuid.uuid4(), RefreshToken.id.type),
+                    revoked.c.user_id,
+                    literal(
+                        hash_refresh_token(new_token),
+                        RefreshToken.token.type,
+                    ),
+                    literal(expires_at, RefreshToken.expires_at.type),
+                ),
+            )
+            .returning(RefreshToken.id)
+        )
+        result = await self._in_savepoint(query)
+        return result.first() is not None
+
+    async def is_revoked(self, token: str) -> bool:
+        result = await self._db_session.execute(
+            select(RefreshToken.revoked_at).where(
+                RefreshToken.token == hash_refresh_token(token)
+            )
+        )
+        revoked_at = result.scalar_one_or_none()
+        return revoked_at is not None
+
+    async def purge_batch(
+        self, cutoff: datetime, after: UUID | None, limit: int
+    ) -> list[UUID]:
+        """
+        Deletes up to limit tokens expired or revoked before cutoff,
+        next in id order after the given id. Rows locked by a
+        concurrent rotation are skipped. Returns deleted ids sorted.
+        """
+        candidates = (
+            select(RefreshToken.id)
+            .where(
+                or_(
+                    RefreshToken.expires_at < cutoff,
+                    RefreshToken.revoked_at < cutoff,
+                )
+            )
+            .order_by(RefreshToken.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if after is not None:
+            candidates = candidates.where(RefreshToken.id > after)
+        result = await self._db_session.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(candidates))
+            .returning(RefreshToken.id)
+        )
+        return sorted(result.scalars().all())
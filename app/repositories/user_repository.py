@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
 from sqlalchemy import Result, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.models import User, RefreshToken
+from core.query_timing import timed_queries
 import uuid
 
 
@@ -15,6 +17,26 @@ class IUserRepository(ABC):
     async def add_user(self, user: User) -> User:
         pass
 
+    @abstractmethod
+    async def get_existing_emails(
+        self, emails: list[str]
+    ) -> set[str]:
+        pass
+
+    @abstractmethod
+    async def add_users(self, users: list[dict]) -> list[str]:
+        pass
+
+    @abstractmethod
+    async def end_transaction(self) -> None:
+        pass
+
+    @abstractmethod
+    async def update_password(
+        self, id: uuid.UUID, password: str
+    ) -> None:
+        pass
+
     @abstractmethod
     async def has_token(self, id: uuid.UUID) -> RefreshToken | None:
         pass
@@ -24,6 +46,7 @@ class IUserRepository(ABC):
         pass
 
 
+@timed_queries
 class UserRepository(IUserRepository):
     def __init__(self, db_session: AsyncSession):
         self._db_session = db_session
@@ -40,6 +63,50 @@ class UserRepository(IUserRepository):
         await self._db_session.flush()
         return user
 
+    async def get_existing_emails(
+        self, emails: list[str]
+    ) -> set[str]:
+        """One query for the whole batch"""
+        if not emails:
+            return set()
+        result = await self._db_session.execute(
+            select(User.email).where(User.email.in_(emails))
+        )
+        return set(result.scalars().all())
+
+    async def end_transaction(self) -> None:
+        """
+        Commits the open transaction and gives the connection back
+        to the pool, the next statement begins a new transaction
+        """
+        await self._db_session.commit()
+
+    async def add_users(self, users: list[dict]) -> list[str]:
+        """
+        Multi-row insert of email and password dicts. Emails that
+        exist by now are skipped by ON CONFLICT, the emails actually
+        inserted are returned.
+        """
+        if not users:
+            return []
+        query = (
+            pg_insert(User)
+            .values([{"id": uuid.uuid4(), **user} for user in users])
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.email)
+        )
+        result = await self._db_session.execute(query)
+        return list(result.scalars().all())
+
+    async def update_password(
+        self, id: uuid.UUID, password: str
+    ) -> None:
+        await self._db_session.execute(
+            update(User)
+            .where(User.id == id)
+            .values(password=password)
+        )
+
     async def has_token(self, id: uuid.UUID) -> RefreshToken | None:
         now = datetime.now(timezone.utc)
         query: Result[
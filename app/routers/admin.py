@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from services.user_service import UserService
+from schemas.schemas import BulkSignupReport, BulkSignupRequest
+from dependancies.user.user_router_dependancy import (
+    get_user_service,
+)
+from dependancies.admin.admin_dependancy import require_admin_key
+from core.errors import HashingPoolSaturated
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin_key)],
+)
+
+
+@router.post(
+    "/users/bulk",
+    response_model=BulkSignupReport,
+    status_code=status.HTTP_201_CREATED,
+)
+async def bulk_create_users(
+    body: BulkSignupRequest,
+    user_service: UserService = Depends(get_user_service),
+):
+    """Creates a batch of users, reports emails that already exist"""
+    try:
+        return await user_service.bulk_create_users(body.users)
+    except HashingPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing is saturated, retry later",
+            headers={"Retry-After": "1"},
+        )
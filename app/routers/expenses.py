@@ -1,34 +1,91 @@
-from typing import Optional
+from typing import Literal, Optional
+from fastapi.responses import StreamingResponse
 from fastapi import (
     APIRouter,
     HTTPException,
     Depends,
     status,
+    Request,
     Response,
     Query,
 )
 from services.expense_service import ExpenseService
 from schemas.schemas import (
+    BatchRequest,
+    BatchResult,
     CreateExpense,
     GetExpenses,
+    GetExpensesList,
+    ImportReport,
+    MonthlySummary,
     UpdateExpense,
-    ExpensesCategory,
 )
 from dependancies.expenses.expenses_router_dependancy import (
     get_expense_service,
+    get_read_expense_service,
+    get_stream_expense_service,
 )
 from dependancies.pagination.pagination_dependancy import (
     PaginationDep,
 )
+from dependancies.filters.filter_dependancy import FilterDep
 from core.errors import (
     CategoryDoesNotExists,
     CurrencyDoesNotExists,
+    ExpenseDoesNotExists,
+    ImportLineTooLong,
+    InvalidCursor,
 )
 from auth.oauth import get_current_user
+from utility.import_parser import iter_csv_rows, iter_ndjson_rows
+from utility.export_encoder import gzip_stream
+from utility.etag import etag_matches
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+IMPORT_PARSERS = {
+    "text/csv": iter_csv_rows,
+    "application/x-ndjson": iter_ndjson_rows,
+    "application/ndjson": iter_ndjson_rows,
+}
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
 
+def _not_modified(
+    request: Request, response: Response, etag: str
+) -> Response | None:
+    """304 when the client copy is current, else tags the response"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+    response.headers.update(headers)
+    return None
+
+
+def _json_response(
+    content: bytes | str,
+    response: Response | None = None,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """
+    Body already serialized by pydantic, so FastAPI skips validating
+    it again against response_model. Keeps headers set on response.
+    """
+    fast = Response(
+        content=content,
+        status_code=status_code,
+        media_type="application/json",
+    )
+    if response is not None:
+        fast.raw_headers.extend(response.raw_headers)
+    return fast
+
+
 @router.post("/", response_model=GetExpenses)
 async def create_expense(
     expense_in: CreateExpense,
@@ -39,7 +96,7 @@ async def create_expense(
         new_expense = await expense_service.create_expense(
             current_user.id, expense_in
         )
-        return new_expense
+        return _json_response(new_expense.model_dump_json())
     except CategoryDoesNotExists:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
@@ -57,28 +114,172 @@ async def create_expense(
         )
 
 
+@router.post(
+    "/batch",
+    response_model=list[BatchResult],
+    status_code=status.HTTP_200_OK,
+)
+async def run_batch(
+    batch: BatchRequest,
+    expense_service: ExpenseService = Depends(get_expense_service),
+    current_user=Depends(get_current_user),
+):
+    """Mixed create/update/delete operations in one transaction"""
+    return await expense_service.run_batch(
+        current_user.id, batch.operations
+    )
+
+
+@router.post(
+    "/import",
+    response_model=ImportReport,
+    status_code=status.HTTP_200_OK,
+)
+async def import_expenses(
+    request: Request,
+    expense_service: ExpenseService = Depends(get_expense_service),
+    current_user=Depends(get_current_user),
+):
+    """
+    Streams a CSV (with header category,currency,amount,note,
+    expense_date) or NDJSON body, depending on Content-Type.
+    """
+    content_type = request.headers.get("content-type", "")
+    parser = IMPORT_PARSERS.get(content_type.split(";")[0].strip())
+    if not parser:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Use text/csv or application/x-ndjson",
+        )
+    try:
+        return await expense_service.import_expenses(
+            current_user.id, parser(request.stream())
+        )
+    except ImportLineTooLong as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Lines may be at most {e} bytes long",
+        )
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_expenses(
+    export_format: Literal["csv", "ndjson"] = Query(
+        default="csv", alias="format"
+    ),
+    gzip: bool = Query(default=False, description="Gzip the body"),
+    expense_service: ExpenseService = Depends(
+        get_stream_expense_service
+    ),
+    current_user=Depends(get_current_user),
+):
+    body = expense_service.export_expenses(
+        current_user.id, export_format
+    )
+    headers = {
+        "Content-Disposition": (
+            f'attachment; filename="expenses.{export_format}"'
+        )
+    }
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=headers,
+    )
+
+
 @router.get(
     "/",
     response_model=list[GetExpenses],
     status_code=status.HTTP_200_OK,
 )
 async def get_all_expenses(
+    request: Request,
+    response: Response,
     pagination: PaginationDep,
-    category: Optional[ExpensesCategory] = Query(
-        default=None, description="Filter by category"
+    filters: FilterDep,
+    expense_service: ExpenseService = Depends(
+        get_read_expense_service
+    ),
+    current_user=Depends(get_current_user),
+):
+    """
+    Next page cursor, if any, is returned in X-Next-Cursor.
+    Answers If-None-Match with 304 without running the query.
+    """
+    etag = await expense_service.get_expenses_etag(current_user.id)
+    not_modified = _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    try:
+        page = await expense_service.get_all_expenses(
+            current_user.id, pagination, filters
+        )
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor is not valid",
+        )
+    except (CategoryDoesNotExists, CurrencyDoesNotExists) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(e),
+        )
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    body = GetExpensesList.dump_json(page.items)
+    return _json_response(body, response)
+
+
+@router.get(
+    "/search",
+    response_model=list[GetExpenses],
+    status_code=status.HTTP_200_OK,
+)
+async def search_expenses(
+    response: Response,
+    pagination: PaginationDep,
+    q: str = Query(..., min_length=1, max_length=200),
+    expense_service: ExpenseService = Depends(
+        get_read_expense_service
     ),
-    expense_service: ExpenseService = Depends(get_expense_service),
     current_user=Depends(get_current_user),
 ):
-    if not category:
-        expenses = await expense_service.get_all_expenses(
-            current_user.id, pagination
+    """Ranked note search, next page cursor is in X-Next-Cursor"""
+    try:
+        page = await expense_service.search_expenses(
+            current_user.id, q, pagination
         )
-    else:
-        expenses = await expense_service.get_expense_by_category(
-            current_user.id, category, pagination
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor is not valid",
         )
-    return expenses
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    body = GetExpensesList.dump_json(page.items)
+    return _json_response(body, response)
+
+
+@router.get(
+    "/summary",
+    response_model=list[MonthlySummary],
+    status_code=status.HTTP_200_OK,
+)
+async def get_monthly_summary(
+    year: int = Query(..., ge=1900, le=9999),
+    month: Optional[int] = Query(default=None, ge=1, le=12),
+    expense_service: ExpenseService = Depends(
+        get_read_expense_service
+    ),
+    current_user=Depends(get_current_user),
+):
+    return await expense_service.get_monthly_summary(
+        current_user.id, year, month
+    )
 
 
 @router.get(
@@ -88,13 +289,27 @@ async def get_all_expenses(
 )
 async def get_expense_by_id(
     id: int,
-    expense_service: ExpenseService = Depends(get_expense_service),
+    request: Request,
+    response: Response,
+    expense_service: ExpenseService = Depends(
+        get_read_expense_service
+    ),
     current_user=Depends(get_current_user),
 ):
-    expense = await expense_service.get_expense_by_id(
-        current_user.id, id
-    )
-    return expense
+    etag = await expense_service.get_expenses_etag(current_user.id)
+    not_modified = _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    try:
+        expense = await expense_service.get_expense_by_id(
+            current_user.id, id
+        )
+    except ExpenseDoesNotExists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Expense not found",
+        )
+    return _json_response(expense.model_dump_json(), response)
 
 
 @router.patch(
@@ -112,7 +327,10 @@ async def update_expense(
         new_expense = await expense_service.update_expense(
             current_user.id, id, user_data
         )
-        return new_expense
+        return _json_response(
+            new_expense.model_dump_json(),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+        )
     except CategoryDoesNotExists:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -123,6 +341,11 @@ async def update_expense(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Currency is not supported",
         )
+    except ExpenseDoesNotExists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Expense not found",
+        )
 
 
 @router.delete(
@@ -133,5 +356,13 @@ async def delete_expense(
     expense_service: ExpenseService = Depends(get_expense_service),
     current_user=Depends(get_current_user),
 ):
-    await expense_service.delete_expense(current_user.id, expense_id)
+    try:
+        await expense_service.delete_expense(
+            current_user.id, expense_id
+        )
+    except ExpenseDoesNotExists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Expense not found",
+        )
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,51 @@
+import os
+from fastapi import APIRouter, Depends, Request
+from core.metrics import pool_metrics
+from core.pool import pool_status
+from database import engine, replica_engines
+from dependancies.admin.admin_dependancy import require_admin_key
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    dependencies=[Depends(require_admin_key)],
+)
+
+
+@router.get("/expense-cache")
+async def expense_cache_stats(request: Request):
+    """Counters of this worker's expense cache, null when disabled"""
+    cache = request.app.state.container.expense_cache
+    return cache.stats() if cache is not None else None
+
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    """Gauges and counters of this worker's connection pools"""
+    engines = {"primary": engine}
+    engines.update(
+        (f"replica-{index}", replica)
+        for index, replica in enumerate(replica_engines)
+    )
+    return {
+        "pid": os.getpid(),
+        "pools": {
+            name: {
+                **pool_status(pool_engine),
+                **pool_metrics[name].snapshot(),
+            }
+            for name, pool_engine in engines.items()
+        },
+    }
+
+
+@router.get("/reference-data")
+async def reference_data_version(request: Request):
+    """Version of the category and currency maps this worker uses"""
+    maps = request.app.state.container.reference_data.maps
+    return {
+        "pid": os.getpid(),
+        "version": maps.version,
+        "categories": len(maps.category_map),
+        "currencies": len(maps.currency_map),
+    }
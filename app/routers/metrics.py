@@ -0,0 +1,30 @@
+import asyncio
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from core.settings import settings
+from utility.prometheus import (
+    merge_snapshots,
+    read_other_snapshots,
+    render,
+    worker_snapshot,
+)
+
+router = APIRouter(tags=["Internal"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Request and query metrics of all workers on this host, other
+    workers are at most METRICS_FLUSH_SECONDS behind
+    """
+    own = worker_snapshot()
+    others = await asyncio.to_thread(
+        read_other_snapshots, settings.METRICS_DIR
+    )
+    return PlainTextResponse(
+        render(merge_snapshots([own, *others])),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
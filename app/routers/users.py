@@ -1,3 +1,4 @@
+from fastapi.responses import JSONResponse
 from fastapi import (
     APIRouter,
     Depends,
@@ -6,11 +7,15 @@ from fastapi import (
     status,
 )
 from services.user_service import UserService
-from schemas.schemas import CreateUser, LoginUser
+from schemas.schemas import CreateUser, LoginUser, RefreshRequest
 from dependancies.user.user_router_dependancy import (
     get_user_service,
 )
 from core.errors import (
+    ConcurrentLoginError,
+    HashingPoolSaturated,
+    InvalidRefreshToken,
+    RefreshTokenReused,
     UserDoesntExist,
     UserAlreadyExists,
     WrongCredentials,
@@ -20,6 +25,21 @@ from auth.oauth import get_current_user
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
+def hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many logins and signups in progress, retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
+def concurrent_login() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Another login of this user happened at the same time",
+    )
+
+
 @router.post("/signup", status_code=201, response_model=None)
 async def create_user(
     user: CreateUser,
@@ -33,6 +53,8 @@ async def create_user(
             status_code=status.HTTP_409_CONFLICT,
             detail="User with this email already exist",
         )
+    except HashingPoolSaturated:
+        raise hashing_busy()
 
 
 @router.post("/login")
@@ -53,6 +75,34 @@ async def login_user(
             status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
             detail="Email or password is not correct",
         )
+    except HashingPoolSaturated:
+        raise hashing_busy()
+    except ConcurrentLoginError:
+        raise concurrent_login()
+
+
+@router.post("/refresh")
+async def refresh_tokens(
+    body: RefreshRequest,
+    user_service: UserService = Depends(get_user_service),
+):
+    """New access and refresh tokens, the refresh token is rotated"""
+    try:
+        return await user_service.refresh_tokens(body.refresh_token)
+    except InvalidRefreshToken:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token is not valid",
+        )
+    except ConcurrentLoginError:
+        raise concurrent_login()
+    except RefreshTokenReused:
+        # returned rather than raised, so the revocation of the
+        # user's tokens is committed
+        return JSONResponse(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            content={"detail": "Refresh token was already used"},
+        )
 
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
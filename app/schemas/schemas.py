@@ -1,7 +1,6 @@
 from datetime import date
 import re
-from enum import StrEnum
-from typing import Optional, Annotated
+from typing import Literal, Optional, Annotated
 from pydantic import (
     BaseModel,
     EmailStr,
@@ -9,60 +8,34 @@ from pydantic import (
     field_validator,
     ConfigDict,
     AfterValidator,
+    TypeAdapter,
 )
 import uuid
 from utility.spent_validator import is_positive
 from utility.date_validator import validate_date
+from utility.reference_validator import (
+    category_schema,
+    currency_schema,
+    validate_category,
+    validate_currency,
+)
 from decimal import Decimal
 
 CheckExpense = Annotated[Decimal, AfterValidator(is_positive)]
 NotInFuture = Annotated[date, AfterValidator(validate_date)]
-
-
-class ExpensesCategory(StrEnum):
-    """
-    ('Food & Groceries'),
-    ('Transportation'),
-    ('Housing & Utilities'),
-    ('Entertainment'),
-    ('Health'),
-    ('Education'),
-    ('Shopping'),
-    ('Travel'),
-    ('Other')
-
-    """
-
-    Food_and_Groceries = "Food & Groceries"
-    Transport = "Transportation"
-    Housing_and_utilities = "Housing & Utilities"
-    Health = "Health"
-    Education = "Education"
-    Shopping = "Shopping"
-    Travel = "Travel"
-    Other = "Other"
-
-
-class Currency(StrEnum):
-    """
-    ('USD', 'US Dollar')
-    ('EUR', 'Euro')
-    ('GBP', 'British Pound')
-    ('UAH', 'Ukrainian Hryvnia)
-    ('PLN', 'Polish Złoty')
-    ('JPY', 'Japanese Yen')
-    ('CAD', 'Canadian Dollar')
-    ('CHF', 'Swiss Franc')
-    """
-
-    USD = "USD"
-    EUR = "EUR"
-    GBP = "GBP"
-    UAH = "UAH"
-    PLN = "PLN"
-    JPY = "JPY"
-    CAD = "CAD"
-    CHF = "CHF"
+# checked against the categories and currencies loaded from the
+# database, see core.reference_data. The OpenAPI schema lists them
+# as an enum, main.openapi rebuilds it after a reload.
+CategoryName = Annotated[
+    str,
+    AfterValidator(validate_category),
+    Field(json_schema_extra=category_schema),
+]
+CurrencyCode = Annotated[
+    str,
+    AfterValidator(validate_currency),
+    Field(json_schema_extra=currency_schema),
+]
 
 
 class CreateUser(BaseModel):
@@ -81,14 +54,25 @@ class CreateUser(BaseModel):
         return value
 
 
+class BulkSignupRequest(BaseModel):
+    users: list[CreateUser] = Field(
+        ..., min_length=1, max_length=1000
+    )
+
+
+class BulkSignupReport(BaseModel):
+    created: list[str]
+    already_existed: list[str]
+
+
 class LoginUser(BaseModel):
     email: str
     password: str
 
 
 class CreateExpense(BaseModel):
-    category: ExpensesCategory
-    currency: Currency
+    category: CategoryName
+    currency: CurrencyCode
     amount: CheckExpense = Field(..., gt=0)
     note: Optional[str] = None
     expense_date: NotInFuture
@@ -107,9 +91,13 @@ class GetExpenses(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# validates or dumps a whole page in one call
+GetExpensesList = TypeAdapter(list[GetExpenses])
+
+
 class UpdateExpense(BaseModel):
-    category_name: Optional[ExpensesCategory] = None
-    currency_code: Optional[Currency] = None
+    category_name: Optional[CategoryName] = None
+    currency_code: Optional[CurrencyCode] = None
     amount: Optional[CheckExpense] = None
     expense_date: Optional[NotInFuture] = None
     note: Optional[str] = ""
@@ -120,6 +108,10 @@ class Token(BaseModel):
     token_type: str
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class TokenPayload(BaseModel):
     sub: uuid.UUID | None = None
     exp: int | None = None
@@ -128,3 +120,94 @@ class TokenPayload(BaseModel):
 class PaginationParams(BaseModel):
     limit: int = Field(30, ge=1, le=50)
     offset: int = Field(0, le=50)
+    cursor: str | None = Field(
+        None, description="Opaque cursor from X-Next-Cursor"
+    )
+
+
+class ExpenseFilterParams(BaseModel):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    amount_min: Optional[float] = Field(None, ge=0)
+    amount_max: Optional[float] = Field(None, ge=0)
+    categories: list[CategoryName] = []
+    currencies: list[CurrencyCode] = []
+    note_prefix: Optional[str] = Field(
+        None, min_length=1, max_length=100
+    )
+
+
+class ExpenseFilter(BaseModel):
+    """ExpenseFilterParams with names resolved to ids"""
+
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    amount_min: Optional[float] = None
+    amount_max: Optional[float] = None
+    category_ids: list[int] = []
+    currency_ids: list[int] = []
+    note_prefix: Optional[str] = None
+
+
+class ExpensePage(BaseModel):
+    items: list[GetExpenses]
+    next_cursor: str | None = None
+
+
+class MonthlySummary(BaseModel):
+    year: int
+    month: int
+    category_name: str | None
+    currency_code: str | None
+    total: float
+    base_total: float
+    count: int
+    # expenses with no known rate, base_total leaves them out
+    unconverted: int
+
+
+class ImportRowError(BaseModel):
+    row: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: list[ImportRowError] = []
+
+
+class BatchCreate(BaseModel):
+    op: Literal["create"]
+    data: CreateExpense
+
+
+class BatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    data: UpdateExpense
+
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+BatchOperation = Annotated[
+    BatchCreate | BatchUpdate | BatchDelete,
+    Field(discriminator="op"),
+]
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(
+        ..., min_length=1, max_length=200
+    )
+
+
+class BatchResult(BaseModel):
+    index: int
+    op: str
+    status_code: int
+    expense: GetExpenses | None = None
+    detail: str | None = None
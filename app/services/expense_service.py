@@ -1,11 +1,23 @@
 import uuid
+from typing import AsyncIterator
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from models.models import Expenses
 from repositories.category_repository import ICategoryRepository
 from repositories.currency_repository import ICurrencyRepository
 from repositories.expense_repository import IExpenseRepository
 from schemas.schemas import (
+    BatchCreate,
+    BatchOperation,
+    BatchResult,
+    BatchUpdate,
     CreateExpense,
+    ExpenseFilter,
+    ExpenseFilterParams,
+    ExpensePage,
+    ImportReport,
+    ImportRowError,
+    MonthlySummary,
     PaginationParams,
     UpdateExpense,
     GetExpenses,
@@ -15,17 +27,31 @@ from core.errors import (
     CurrencyDoesNotExists,
     ExpenseDoesNotExists,
 )
+from utility.export_encoder import encode_batches
+from utility.import_parser import ParsedRow
+from utility.etag import make_etag
+
+EXPORT_BATCH_SIZE = 1000
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_ERRORS = 1000
 
 
 class ExpenseService:
     """
     Expense repo methods:
-        get_user_expenses(user_id, pagination)
-        get_expense_by_category(user_id, category, pagination)
+        get_user_expenses(user_id, pagination, filters)
         get_expense_by_id(user_id, expense_id)
+        search_expenses(user_id, q, pagination)
         create_expense(expense_data)
         change_expense(user_id, expense_id, new_data)
         delete_expense(user_id, expense_id)
+        get_monthly_summary(user_id, year, month)
+        copy_expenses(user_id, records)
+        stream_user_expenses(user_id, batch_size)
+        get_expenses_by_ids(user_id, expense_ids)
+        create_expenses(user_id, rows)
+        change_expenses(user_id, changes)
+        delete_expenses(user_id, expense_ids)
     """
 
     def __init__(
@@ -44,24 +70,52 @@ class ExpenseService:
         self.currency_map: dict[str, int] = currency_map
         self.category_map: dict[str, int] = category_map
 
-    async def create_expense(
-        self, user_id: uuid.UUID, user_data: CreateExpense
-    ) -> GetExpenses:
-        currency_id: int | None = self.currency_map[
-            user_data.currency.value
-        ]
+    def _resolve_ids(
+        self, category: str, currency: str
+    ) -> tuple[int, int]:
+        category_id: int | None = self.category_map.get(category)
+        if not category_id:
+            raise CategoryDoesNotExists(
+                f"Category {category} is not supported"
+            )
+        currency_id: int | None = self.currency_map.get(currency)
         if not currency_id:
             raise CurrencyDoesNotExists(
-                f"Currency {user_data.currency} is not supported"
+                f"Currency {currency} is not supported"
             )
+        return category_id, currency_id
 
-        category_id: int | None = self.category_map[
-            user_data.category.value
-        ]
-        if not category_id:
-            raise CategoryDoesNotExists(
-                f"Category {user_data.category} is not supported"
+    def _update_values(self, user_data: UpdateExpense) -> dict:
+        """UpdateExpense fields mapped onto Expenses columns"""
+        update_data = user_data.model_dump(exclude_unset=True)
+        if "category_name" in update_data:
+            category_id: int | None = self.category_map.get(
+                update_data["category_name"]
+            )
+            if not category_id:
+                raise CategoryDoesNotExists(
+                    f"Category {update_data['category_name']} is not supported"
+                )
+            update_data["category_id"] = category_id
+            del update_data["category_name"]
+        if "currency_code" in update_data:
+            currency_id: int | None = self.currency_map.get(
+                update_data["currency_code"]
             )
+            if not currency_id:
+                raise CurrencyDoesNotExists(
+                    f"Currency {update_data['currency_code']} is not supported"
+                )
+            update_data["currency_id"] = currency_id
+            del update_data["currency_code"]
+        return update_data
+
+    async def create_expense(
+        self, user_id: uuid.UUID, user_data: CreateExpense
+    ) -> GetExpenses:
+        category_id, currency_id = self._resolve_ids(
+            user_data.category, user_data.currency
+        )
 
         expense = Expenses(
             user_id=user_id,
@@ -86,23 +140,68 @@ class ExpenseService:
             raise ExpenseDoesNotExists
         return expense
 
-    async def get_expense_by_category(
+    def export_expenses(
+        self, user_id: uuid.UUID, export_format: str
+    ) -> AsyncIterator[bytes]:
+        batches = self.expense_repo.stream_user_expenses(
+            user_id, EXPORT_BATCH_SIZE
+        )
+        return encode_batches(batches, export_format)
+
+    async def search_expenses(
         self,
         user_id: uuid.UUID,
-        category: str,
+        q: str,
         pagination: PaginationParams,
-    ) -> list[GetExpenses]:
-        expenses = await self.expense_repo.get_expense_by_category(
-            user_id, category, pagination
+    ) -> ExpensePage:
+        return await self.expense_repo.search_expenses(
+            user_id, q, pagination
         )
 
-        return expenses
+    def _resolve_filters(
+        self, params: ExpenseFilterParams
+    ) -> ExpenseFilter:
+        category_ids = []
+        for category in params.categories:
+            category_id = self.category_map.get(category)
+            if not category_id:
+                raise CategoryDoesNotExists(
+                    f"Category {category} is not supported"
+                )
+            category_ids.append(category_id)
+        currency_ids = []
+        for currency in params.currencies:
+            currency_id = self.currency_map.get(currency)
+            if not currency_id:
+                raise CurrencyDoesNotExists(
+                    f"Currency {currency} is not supported"
+                )
+            currency_ids.append(currency_id)
+        return ExpenseFilter(
+            date_from=params.date_from,
+            date_to=params.date_to,
+            amount_min=params.amount_min,
+            amount_max=params.amount_max,
+            category_ids=category_ids,
+            currency_ids=currency_ids,
+            note_prefix=params.note_prefix,
+        )
+
+    async def get_expenses_etag(self, user_id: uuid.UUID) -> str:
+        repo = self.expense_repo
+        version = await repo.get_expenses_version(user_id)
+        return make_etag(user_id, version)
 
     async def get_all_expenses(
-        self, user_id: uuid.UUID, pagination: PaginationParams
-    ) -> list[GetExpenses]:
+        self,
+        user_id: uuid.UUID,
+        pagination: PaginationParams,
+        filters: ExpenseFilterParams | None = None,
+    ) -> ExpensePage:
         expenses = await self.expense_repo.get_user_expenses(
-            user_id, pagination
+            user_id,
+            pagination,
+            self._resolve_filters(filters) if filters else None,
         )
         return expenses
 
@@ -123,27 +222,9 @@ class ExpenseService:
         expense_id: int,
         user_data: UpdateExpense,
     ) -> GetExpenses:
-        update_data = user_data.model_dump(exclude_unset=True)
-        if "category_name" in update_data:
-            category_id: int | None = self.category_map.get(
-                update_data["category_name"]
-            )
-            if not category_id:
-                raise CategoryDoesNotExists(
-                    f"Category {update_data['category_name']} is not supported"
-                )
-            update_data["category_id"] = category_id
-            del update_data["category_name"]
-        if "currency_code" in update_data:
-            currency_id: int | None = self.currency_map.get(
-                update_data["currency_code"]
-            )
-            if not currency_id:
-                raise CurrencyDoesNotExists(
-                    f"Currency {update_data['currency_name']} is not supported"
-                )
-            update_data["currency_id"] = currency_id
-            del update_data["currency_code"]
+        update_data = self._update_values(user_data)
+        if not update_data:
+            return await self.get_expense_by_id(user_id, expense_id)
         expense = await self.expense_repo.change_expense(
             user_id, expense_id, update_data
         )
@@ -151,7 +232,198 @@ class ExpenseService:
             raise ExpenseDoesNotExists(
                 f"Expense {expense_id} not found or not owned"
             )
-        fresh = await self.expense_repo.get_expense_by_id(
-            user_id, expense_id
+        return GetExpenses.model_validate(expense)
+
+    async def get_monthly_summary(
+        self, user_id: uuid.UUID, year: int, month: int | None
+    ) -> list[MonthlySummary]:
+        """Totals per month, category and currency from the rollup"""
+        category_names = {v: k for k, v in self.category_map.items()}
+        currency_codes = {v: k for k, v in self.currency_map.items()}
+        rows = await self.expense_repo.get_monthly_summary(
+            user_id, year, month
         )
-        return GetExpenses.model_validate(fresh)
+        return [
+            MonthlySummary(
+                year=row["year"],
+                month=row["month"],
+                category_name=category_names.get(row["category_id"]),
+                currency_code=currency_codes.get(row["currency_id"]),
+                total=row["total"],
+                base_total=row["base_total"],
+                count=row["count"],
+                unconverted=row["unconverted"],
+            )
+            for row in rows
+        ]
+
+    def _to_record(self, data: dict) -> tuple:
+        """Validates one imported row against CreateExpense rules"""
+        expense = CreateExpense.model_validate(data)
+        category_id, currency_id = self._resolve_ids(
+            expense.category, expense.currency
+        )
+        return (
+            category_id,
+            currency_id,
+            float(expense.amount),
+            expense.note,
+            expense.expense_date,
+        )
+
+    async def import_expenses(
+        self, user_id: uuid.UUID, rows: AsyncIterator[ParsedRow]
+    ) -> ImportReport:
+        """
+        Valid rows are written with COPY in chunks of
+        IMPORT_CHUNK_SIZE, invalid ones are reported and skipped.
+        """
+        report = ImportReport()
+        chunk: list[tuple] = []
+
+        def fail(row_number: int, detail: str) -> None:
+            report.failed += 1
+            if len(report.errors) < MAX_IMPORT_ERRORS:
+                report.errors.append(
+                    ImportRowError(row=row_number, detail=detail)
+                )
+
+        async for row_number, data, error in rows:
+            if error or data is None:
+                fail(row_number, error or "Empty row")
+                continue
+            try:
+                chunk.append(self._to_record(data))
+            except ValidationError as e:
+                first = e.errors()[0]
+                field = ".".join(str(loc) for loc in first["loc"])
+                fail(row_number, f"{field}: {first['msg']}")
+                continue
+            except (
+                CategoryDoesNotExists,
+                CurrencyDoesNotExists,
+            ) as e:
+                fail(row_number, str(e))
+                continue
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                report.imported += await self._copy(user_id, chunk)
+                chunk = []
+        report.imported += await self._copy(user_id, chunk)
+        return report
+
+    async def _copy(
+        self, user_id: uuid.UUID, records: list[tuple]
+    ) -> int:
+        return await self.expense_repo.copy_expenses(user_id, records)
+
+    async def run_batch(
+        self, user_id: uuid.UUID, operations: list[BatchOperation]
+    ) -> list[BatchResult]:
+        """
+        Runs creates, then updates, then deletes, one statement per
+        kind, within the request transaction. An expense id may only
+        be touched once per batch.
+        """
+        results: dict[int, BatchResult] = {}
+        creates: list[tuple[int, dict]] = []
+        changes: dict[int, int] = {}
+        change_values: dict[int, dict] = {}
+        deletes: dict[int, int] = {}
+
+        for index, operation in enumerate(operations):
+            if isinstance(operation, BatchCreate):
+                data = operation.data
+                try:
+                    category_id, currency_id = self._resolve_ids(
+                        data.category, data.currency
+                    )
+                except (
+                    CategoryDoesNotExists,
+                    CurrencyDoesNotExists,
+                ) as e:
+                    results[index] = BatchResult(
+                        index=index,
+                        op=operation.op,
+                        status_code=422,
+                        detail=str(e),
+                    )
+                    continue
+                creates.append(
+                    (
+                        index,
+                        {
+                            "category_id": category_id,
+                            "currency_id": currency_id,
+                            "amount": data.amount,
+                            "note": data.note,
+                            "expense_date": data.expense_date,
+                        },
+                    )
+                )
+                continue
+
+            if operation.id in changes or operation.id in deletes:
+                results[index] = BatchResult(
+                    index=index,
+                    op=operation.op,
+                    status_code=409,
+                    detail=f"Expense {operation.id} is repeated",
+                )
+                continue
+            if isinstance(operation, BatchUpdate):
+                try:
+                    update_data = self._update_values(operation.data)
+                except (
+                    CategoryDoesNotExists,
+                    CurrencyDoesNotExists,
+                ) as e:
+                    results[index] = BatchResult(
+                        index=index,
+                        op=operation.op,
+                        status_code=422,
+                        detail=str(e),
+                    )
+                    continue
+                changes[operation.id] = index
+                change_values[operation.id] = update_data
+            else:
+                deletes[operation.id] = index
+
+        created_ids = await self.expense_repo.create_expenses(
+            user_id, [row for _, row in creates]
+        )
+        updated_ids = await self.expense_repo.change_expenses(
+            user_id, change_values
+        )
+        deleted_ids = await self.expense_repo.delete_expenses(
+            user_id, list(deletes)
+        )
+        fresh = await self.expense_repo.get_expenses_by_ids(
+            user_id, [*created_ids, *updated_ids]
+        )
+
+        for (index, _), expense_id in zip(creates, created_ids):
+            results[index] = BatchResult(
+                index=index,
+                op="create",
+                status_code=201,
+                expense=fresh.get(expense_id),
+            )
+        for expense_id, index in changes.items():
+            found = expense_id in updated_ids
+            results[index] = BatchResult(
+                index=index,
+                op="update",
+                status_code=200 if found else 404,
+                expense=fresh.get(expense_id),
+                detail=None if found else "Expense not found",
+            )
+        for expense_id, index in deletes.items():
+            found = expense_id in deleted_ids
+            results[index] = BatchResult(
+                index=index,
+                op="delete",
+                status_code=204 if found else 404,
+                detail=None if found else "Expense not found",
+            )
+        return [results[index] for index in sorted(results)]
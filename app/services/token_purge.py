@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from repositories.token_repository import TokenRepository
+
+logger = logging.getLogger("token_purge")
+
+# pg advisory lock key, only one worker purges at a time
+TOKEN_PURGE_LOCK_ID = 7_201_901
+
+
+async def purge_tokens(
+    async_session: async_sessionmaker,
+    retention: timedelta,
+    batch_size: int,
+    pause_seconds: float,
+) -> int:
+    """
+    Deletes refresh tokens expired or revoked longer than retention
+    ago, one short transaction per batch with a pause in between.
+    Returns how many rows were deleted.
+    """
+    cutoff = datetime.now(timezone.utc) - retention
+    after = None
+    purged = 0
+    while True:
+        async with async_session() as session:
+            deleted = await TokenRepository(session).purge_batch(
+                cutoff, after, batch_size
+            )
+            await session.commit()
+        if not deleted:
+            return purged
+        purged += len(deleted)
+        after = deleted[-1]
+        await asyncio.sleep(pause_seconds)
+
+
+async def purge_tokens_exclusively(
+    engine: AsyncEngine,
+    async_session: async_sessionmaker,
+    retention: timedelta,
+    batch_size: int,
+    pause_seconds: float,
+) -> int | None:
+    """purge_tokens under an advisory lock, None if it is taken"""
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(
+            isolation_level="AUTOCOMMIT"
+        )
+        locked = await connection.scalar(
+            select(func.pg_try_advisory_lock(TOKEN_PURGE_LOCK_ID))
+        )
+        if not locked:
+            return None
+        try:
+            return await purge_tokens(
+                async_session, retention, batch_size, pause_seconds
+            )
+        finally:
+            await connection.execute(
+                select(func.pg_advisory_unlock(TOKEN_PURGE_LOCK_ID))
+            )
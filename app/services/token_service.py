@@ -1,22 +1,27 @@
+import uuid
 from core.settings import Settings
+from core.errors import InvalidRefreshToken
 from typing import Any
 from datetime import datetime, timedelta
-from jose import jwt
+from jose import JWTError, jwt
 from abc import ABC, abstractmethod
-from models.models import User
 
 
 class ITokenService(ABC):
     @abstractmethod
-    def create_token(self, user: User) -> str:
+    def create_token(self, user_id: uuid.UUID) -> str:
         pass
 
     @abstractmethod
     def create_refresh_token(
-        self, user: User
+        self, user_id: uuid.UUID
     ) -> tuple[str, datetime]:
         pass
 
+    @abstractmethod
+    def decode_refresh_token(self, token: str) -> uuid.UUID:
+        pass
+
 
 class TokenService(ITokenService):
     def __init__(self, settings: Settings):
@@ -25,8 +30,8 @@ class TokenService(ITokenService):
         self.access_ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES
         self.refresh_ttl = settings.LONG_EXPIRE
 
-    def create_token(self, user: User) -> str:
-        to_encode: dict[str, Any] = {"sub": str(user.id)}
+    def create_token(self, user_id: uuid.UUID) -> str:
+        to_encode: dict[str, Any] = {"sub": str(user_id)}
         expire: datetime | float = datetime.now() + timedelta(
             minutes=self.access_ttl  # type: ignore
         )
@@ -39,9 +44,13 @@ class TokenService(ITokenService):
         return encoded
 
     def create_refresh_token(
-        self, user: User
+        self, user_id: uuid.UUID
     ) -> tuple[str, datetime]:
-        to_encode: dict[str, Any] = {"sub": str(user.id)}
+        # jti keeps two tokens issued within a second distinct
+        to_encode: dict[str, Any] = {
+            "sub": str(user_id),
+            "jti": uuid.uuid4().hex,
+        }
         expire: datetime | float = datetime.now() + timedelta(
             minutes=self.refresh_ttl  # type: ignore
         )
@@ -52,3 +61,16 @@ class TokenService(ITokenService):
             algorithm=self.algorithm,
         )
         return encoded, expire
+
+    def decode_refresh_token(self, token: str) -> uuid.UUID:
+        """
+        User id of a well signed, unexpired token. Whether it is a
+        live refresh token is up to the stored hashes.
+        """
+        try:
+            payload = jwt.decode(
+                token, self.secret_key, algorithms=[self.algorithm]
+            )
+            return uuid.UUID(payload["sub"])
+        except (JWTError, KeyError, ValueError):
+            raise InvalidRefreshToken("Refresh token is not valid")
@@ -1,7 +1,8 @@
 from services.token_service import ITokenService
+from auth.principal_cache import invalidate_principal
 from repositories.token_repository import ITokenRepository
 from models.models import User
-from schemas.schemas import CreateUser, LoginUser
+from schemas.schemas import BulkSignupReport, CreateUser, LoginUser
 from repositories.user_repository import (
     IUserRepository,
 )
@@ -9,6 +10,8 @@ from repositories.password_repository import (
     IPasswordHasher,
 )
 from core.errors import (
+    InvalidRefreshToken,
+    RefreshTokenReused,
     UserDoesntExist,
     UserAlreadyExists,
     WrongCredentials,
@@ -49,7 +52,7 @@ class UserService:
         await self.validate_user_data(user_data)
         await self.check_user_exists(user_data.email)
         user: User = User(
-            password=self.password_repository.hash_password(
+            password=await self.password_repository.hash_password(
                 user_data.password
             ),
             email=user_data.email,
@@ -57,6 +60,47 @@ class UserService:
         new_user: User = await self.user_repository.add_user(user)
         return new_user
 
+    async def bulk_create_users(
+        self, users: list[CreateUser]
+    ) -> BulkSignupReport:
+        """
+        Signs up a batch. Emails known up front are found with one
+        query and never hashed, the rest are hashed across the bulk
+        pool and inserted in one statement. Emails that appear in
+        the meantime, or twice in the batch, count as existing.
+        """
+        emails = [user.email for user in users]
+        existing = await self.user_repository.get_existing_emails(
+            emails
+        )
+        # hashing a batch takes long, hold no connection meanwhile
+        await self.user_repository.end_transaction()
+        pending: dict[str, str] = {}
+        already_existed: list[str] = []
+        for user in users:
+            if user.email in existing or user.email in pending:
+                already_existed.append(user.email)
+            else:
+                pending[user.email] = user.password
+        hashes = await self.password_repository.hash_passwords(
+            list(pending.values())
+        )
+        created = set(
+            await self.user_repository.add_users(
+                [
+                    {"email": email, "password": hashed}
+                    for email, hashed in zip(pending, hashes)
+                ]
+            )
+        )
+        already_existed.extend(
+            email for email in pending if email not in created
+        )
+        return BulkSignupReport(
+            created=[email for email in pending if email in created],
+            already_existed=already_existed,
+        )
+
     async def login_user(self, user_data: LoginUser):
         """
         Right now the main problem with the authorization handling is that
@@ -75,18 +119,24 @@ class UserService:
         if not user:
             raise UserDoesntExist
 
-        if not self.password_repository.verify_password(
+        if not await self.password_repository.verify_password(
             user_data.password, user.password
         ):
             raise WrongCredentials
+        if self.password_repository.needs_rehash(user.password):
+            await self.user_repository.update_password(
+                user.id,
+                await self.password_repository.hash_password(
+                    user_data.password
+                ),
+            )
 
-        await self.token_repository.revoke_token(user.id)
-        access_token: str = self.token_service.create_token(user)
+        access_token: str = self.token_service.create_token(user.id)
         refresh_token, expires_at = (
-            self.token_service.create_refresh_token(user)
+            self.token_service.create_refresh_token(user.id)
         )
 
-        await self.token_repository.save(
+        await self.token_repository.replace_tokens(
             user.id,
             refresh_token,
             expires_at=expires_at,
@@ -97,6 +147,37 @@ class UserService:
             "token_type": "bearer",
         }
 
+    async def refresh_tokens(self, refresh_token: str):
+        """
+        Trades a live refresh token for a new pair, the old one is
+        revoked in the same statement. A revoked token presented
+        again means it leaked, so every token of the user is revoked.
+
+        Raises:
+            InvalidRefreshToken: unknown, expired or badly signed
+            RefreshTokenReused: the token was already rotated
+        """
+        user_id = self.token_service.decode_refresh_token(
+            refresh_token
+        )
+        new_refresh_token, expires_at = (
+            self.token_service.create_refresh_token(user_id)
+        )
+        rotated = await self.token_repository.rotate(
+            user_id, refresh_token, new_refresh_token, expires_at
+        )
+        if not rotated:
+            if await self.token_repository.is_revoked(refresh_token):
+                await self.token_repository.revoke_token(user_id)
+                raise RefreshTokenReused
+            raise InvalidRefreshToken
+        return {
+            "access_token": self.token_service.create_token(user_id),
+            "refresh_token": new_refresh_token,
+            "token_type": "bearer",
+        }
+
     async def logout_user(self, user_id):
         """If front-end is done, revokes token, setting expire_date at db to datetime.now()"""
         await self.token_repository.revoke_token(user_id)
+        invalidate_principal(user_id)
@@ -0,0 +1,48 @@
+import base64
+import json
+from datetime import date
+from core.errors import InvalidCursor
+
+
+def _encode(payload: list) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise InvalidCursor(f"Cursor {cursor} is malformed")
+    if not isinstance(payload, list):
+        raise InvalidCursor(f"Cursor {cursor} is malformed")
+    return payload
+
+
+def encode_cursor(expense_date: date, expense_id: int) -> str:
+    """Opaque keyset position of the last row on a page"""
+    return _encode([expense_date.isoformat(), expense_id])
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    payload = _decode(cursor)
+    try:
+        expense_date, expense_id = payload
+        return date.fromisoformat(expense_date), int(expense_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor(f"Cursor {cursor} is malformed")
+
+
+def encode_rank_cursor(rank: float, expense_id: int) -> str:
+    """Opaque position of the last row on a ranked search page"""
+    return _encode([rank, expense_id])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    payload = _decode(cursor)
+    try:
+        rank, expense_id = payload
+        return float(rank), int(expense_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor(f"Cursor {cursor} is malformed")
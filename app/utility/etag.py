@@ -0,0 +1,22 @@
+import uuid
+
+
+def make_etag(user_id: uuid.UUID, version: int) -> str:
+    """
+    Weak validator of a user's expense reads. The user id is part of
+    it, so a client cache shared between accounts never matches.
+    """
+    return f'W/"{user_id.hex}-{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of If-None-Match against the current ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterator, Sequence
+from sqlalchemy import RowMapping
+
+EXPORT_COLUMNS = (
+    "id",
+    "expense_date",
+    "category_name",
+    "currency_code",
+    "amount",
+    "note",
+)
+
+
+def _export_row(row: RowMapping) -> dict:
+    return {
+        "id": row["id"],
+        "expense_date": row["expense_date"].isoformat(),
+        "category_name": row["category_name"],
+        "currency_code": row["currency_code"],
+        "amount": row["amount"],
+        "note": row["note"],
+    }
+
+
+def encode_csv_batch(
+    rows: Sequence[RowMapping], with_header: bool
+) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    if with_header:
+        writer.writeheader()
+    writer.writerows(_export_row(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+def encode_ndjson_batch(rows: Sequence[RowMapping]) -> bytes:
+    return "".join(
+        json.dumps(_export_row(row), ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+async def encode_batches(
+    batches: AsyncIterator[Sequence[RowMapping]], export_format: str
+) -> AsyncIterator[bytes]:
+    if export_format == "csv":
+        yield encode_csv_batch([], with_header=True)
+        async for rows in batches:
+            yield encode_csv_batch(rows, with_header=False)
+    else:
+        async for rows in batches:
+            yield encode_ndjson_batch(rows)
+
+
+async def gzip_stream(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[bytes]:
+    """Gzip framing, flushed per chunk so rows reach clients early"""
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+    yield compressor.flush()
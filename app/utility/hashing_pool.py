@@ -0,0 +1,130 @@
+import asyncio
+import threading
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Callable, TypeVar
+from core.errors import HashingPoolSaturated
+
+T = TypeVar("T")
+
+
+class PendingLimit:
+    """
+    Counts executor jobs queued or running. A job gives its slot
+    back from a done callback on the executor future, so a job whose
+    caller was cancelled keeps the slot until it really finishes.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self._pending = 0
+        # done callbacks run in the executor's threads
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def acquire(self, jobs: int) -> None:
+        with self._lock:
+            if self._pending + jobs > self.max_pending:
+                raise HashingPoolSaturated(
+                    f"{self._pending} hashing jobs already pending"
+                )
+            self._pending += jobs
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def submit(
+        self, executor: Executor, func: Callable[..., T], *args
+    ) -> asyncio.Future[T]:
+        """Submits a job acquired beforehand"""
+        try:
+            future = executor.submit(func, *args)
+        except BaseException:
+            self._release(Future())
+            raise
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+
+class HashingPool:
+    """
+    Runs CPU heavy password hashing off the event loop. bcrypt drops
+    the GIL while it hashes, so threads run truly in parallel. At
+    most max_pending calls may be queued or running, the next one
+    raises HashingPoolSaturated instead of waiting. A call keeps its
+    slot until its thread is done, even if the request awaiting it
+    was cancelled.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self._limit = PendingLimit(max_pending)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="hashing"
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._limit.pending
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        self._limit.acquire(1)
+        return await self._limit.submit(self._executor, func, *args)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ProcessHashingPool:
+    """
+    Process pool for hashing whole batches, started on first use so
+    workers that never get a bulk request never fork. func must be
+    a module level function taking a list and returning a list. A
+    batch is split in up to one chunk per process, at most
+    max_pending chunks may be queued or running, a batch that does
+    not fit raises HashingPoolSaturated instead of waiting.
+    """
+
+    def __init__(self, processes: int, max_pending: int):
+        self.processes = processes
+        self._limit = PendingLimit(max_pending)
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def pending(self) -> int:
+        return self._limit.pending
+
+    async def map_chunks(
+        self, func: Callable[..., list[T]], items: list, *args
+    ) -> list[T]:
+        if not items:
+            return []
+        size = -(-len(items) // self.processes)
+        starts = range(0, len(items), size)
+        self._limit.acquire(len(starts))
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.processes)
+        chunks = await asyncio.gather(
+            *(
+                self._limit.submit(
+                    self._executor,
+                    func,
+                    items[start : start + size],
+                    *args,
+                )
+                for start in starts
+            )
+        )
+        return [item for chunk in chunks for item in chunk]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
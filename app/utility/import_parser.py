@@ -0,0 +1,85 @@
+import csv
+import json
+from typing import AsyncIterator
+from core.errors import ImportLineTooLong
+
+# (row number, parsed row, parse error)
+ParsedRow = tuple[int, dict | None, str | None]
+
+MAX_LINE_BYTES = 64 * 1024
+
+
+def _decode(line: bytes) -> str:
+    return line.rstrip(b"\r").decode("utf-8-sig", "replace")
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = MAX_LINE_BYTES,
+) -> AsyncIterator[str]:
+    """
+    Splits a streamed body into lines without buffering it whole.
+    Only the new chunk is searched for line ends, a line longer than
+    max_line_bytes raises ImportLineTooLong.
+    """
+    pending: list[bytes] = []
+    pending_size = 0
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if pending_size + end - start > max_line_bytes:
+                raise ImportLineTooLong(max_line_bytes)
+            line = b"".join([*pending, chunk[start:end]])
+            pending.clear()
+            pending_size = 0
+            start = end + 1
+            yield _decode(line)
+        if start < len(chunk):
+            pending.append(chunk[start:])
+            pending_size += len(chunk) - start
+            if pending_size > max_line_bytes:
+                raise ImportLineTooLong(max_line_bytes)
+    if pending:
+        yield _decode(b"".join(pending))
+
+
+async def iter_csv_rows(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[ParsedRow]:
+    """
+    First line is the header. Quoted fields spanning several lines
+    are not supported.
+    """
+    header: list[str] | None = None
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, "Wrong number of columns"
+            continue
+        yield row_number, dict(zip(header, values)), None
+
+
+async def iter_ndjson_rows(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[ParsedRow]:
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield row_number, None, "Invalid JSON"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Row must be a JSON object"
+            continue
+        yield row_number, data, None
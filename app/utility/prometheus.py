@@ -0,0 +1,378 @@
+import fcntl
+import functools
+import json
+import os
+import threading
+from contextlib import contextmanager
+from core.metrics import request_metrics
+from core.query_timing import query_metrics
+
+# quantiles of db_query_duration_seconds, over the latest durations
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+# uvicorn workers are processes, each one writes its snapshot to
+# <METRICS_DIR>/<pid>.json and GET /metrics adds them up. Counters
+# of exited workers are folded into ARCHIVE so totals never drop.
+ARCHIVE = "archive.json"
+ARCHIVE_LOCK = "archive.lock"
+
+# a flush thread still running at shutdown must not recreate the
+# file of a worker whose counters are already in the archive
+_write_lock = threading.Lock()
+_archived = False
+
+
+@functools.cache
+def own_identity() -> str | None:
+    return process_identity(os.getpid())
+
+
+def process_identity(pid: int) -> str | None:
+    """
+    Boot id and start time of a process, tells a reused pid apart.
+    None off Linux or when the process is gone.
+    """
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as file:
+            boot_id = file.read().strip()
+        with open(f"/proc/{pid}/stat") as file:
+            stat = file.read()
+    except OSError:
+        return None
+    # the command name may hold spaces, starttime is field 22
+    start_ticks = stat.rsplit(")", 1)[1].split()[19]
+    return f"{boot_id}:{start_ticks}"
+
+
+def worker_snapshot() -> dict:
+    """Call on the event loop, the metrics change between awaits"""
+    return {
+        "identity": own_identity(),
+        **request_metrics.snapshot(),
+        "queries": query_metrics.snapshot(),
+    }
+
+
+def snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"{pid}.json")
+
+
+def _write_json(path: str, data: dict) -> None:
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(data, file)
+    # readers never see a half written file
+    os.replace(temporary, path)
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(directory: str, snapshot: dict) -> None:
+    with _write_lock:
+        if _archived:
+            return
+        os.makedirs(directory, exist_ok=True)
+        _write_json(snapshot_path(directory, os.getpid()), snapshot)
+
+
+@contextmanager
+def _archive_locked(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ARCHIVE_LOCK), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _as_snapshot(merged: dict) -> dict:
+    """
+    merge_snapshots result in snapshot form, without the in-flight
+    gauge and the duration samples of the quantiles
+    """
+    return {
+        "in_flight": 0,
+        "requests": [
+            [*key, count] for key, count in merged["requests"].items()
+        ],
+        "latency": [
+            [*key, histogram]
+            for key, histogram in merged["latency"].items()
+        ],
+        "sizes": [
+            [*key, histogram]
+            for key, histogram in merged["sizes"].items()
+        ],
+        "queries": {
+            "queries": [
+                [*key, *totals]
+                for key, totals in merged["queries"].items()
+            ],
+            "slow": [
+                [operation, count]
+                for operation, count in merged["slow_queries"].items()
+            ],
+            "durations": [],
+        },
+    }
+
+
+def _archive(directory: str, snapshots: list[dict]) -> None:
+    """Adds snapshots to the archive, the caller holds the lock"""
+    path = os.path.join(directory, ARCHIVE)
+    archive = _read_json(path)
+    if archive is not None:
+        snapshots = [archive, *snapshots]
+    _write_json(path, _as_snapshot(merge_snapshots(snapshots)))
+
+
+def archive_snapshot(directory: str, snapshot: dict) -> None:
+    """Final snapshot of a stopping worker goes to the archive"""
+    global _archived
+    with _write_lock, _archive_locked(directory):
+        _archived = True
+        _archive(directory, [snapshot])
+        try:
+            os.remove(snapshot_path(directory, os.getpid()))
+        except FileNotFoundError:
+            pass
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_running(pid: int, identity: str | None) -> bool:
+    """Whether the worker that wrote the snapshot still runs"""
+    if not _is_alive(pid):
+        return False
+    if identity is None:
+        return True
+    return process_identity(pid) in (None, identity)
+
+
+def read_other_snapshots(directory: str) -> list[dict]:
+    """
+    Last flushed snapshot of every other running worker, plus the
+    archive. Files of exited workers, or of a pid now reused by
+    another process, are folded into the archive first.
+    """
+    own = os.getpid()
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    snapshots = []
+    exited = {}
+    with _archive_locked(directory):
+        for name in names:
+            pid, extension = os.path.splitext(name)
+            if extension != ".json" or not pid.isdigit():
+                continue
+            if int(pid) == own:
+                continue
+            path = os.path.join(directory, name)
+            snapshot = _read_json(path)
+            if snapshot is None:
+                continue
+            if _is_running(int(pid), snapshot.get("identity")):
+                snapshots.append(snapshot)
+            else:
+                exited[path] = snapshot
+        if exited:
+            _archive(directory, list(exited.values()))
+            for path in exited:
+                os.remove(path)
+        archive = _read_json(os.path.join(directory, ARCHIVE))
+    if archive is not None:
+        snapshots.append(archive)
+    return snapshots
+
+
+def _merge_histogram(total: dict | None, histogram: dict) -> dict:
+    if total is None:
+        return {
+            "buckets": dict(histogram["buckets"]),
+            "count": histogram["count"],
+            "sum": histogram["sum"],
+        }
+    buckets = total["buckets"]
+    for bound, count in histogram["buckets"].items():
+        buckets[bound] = buckets.get(bound, 0) + count
+    total["count"] += histogram["count"]
+    total["sum"] += histogram["sum"]
+    return total
+
+
+def merge_snapshots(snapshots: list[dict]) -> dict:
+    in_flight = 0
+    requests: dict[tuple, int] = {}
+    latency: dict[tuple, dict] = {}
+    sizes: dict[tuple, dict] = {}
+    queries: dict[tuple, list] = {}
+    slow: dict[str, int] = {}
+    durations: dict[str, list[float]] = {}
+    for snapshot in snapshots:
+        in_flight += snapshot["in_flight"]
+        for method, route, status, count in snapshot["requests"]:
+            key = (method, route, status)
+            requests[key] = requests.get(key, 0) + count
+        for method, route, histogram in snapshot["latency"]:
+            key = (method, route)
+            latency[key] = _merge_histogram(
+                latency.get(key), histogram
+            )
+        for method, route, histogram in snapshot["sizes"]:
+            key = (method, route)
+            sizes[key] = _merge_histogram(sizes.get(key), histogram)
+        worker_queries = snapshot.get("queries", {})
+        for operation, route, count, seconds in worker_queries.get(
+            "queries", []
+        ):
+            total = queries.setdefault((operation, route), [0, 0.0])
+            total[0] += count
+            total[1] += seconds
+        for operation, count in worker_queries.get("slow", []):
+            slow[operation] = slow.get(operation, 0) + count
+        for operation, values in worker_queries.get("durations", []):
+            durations.setdefault(operation, []).extend(values)
+    return {
+        "in_flight": in_flight,
+        "requests": requests,
+        "latency": latency,
+        "sizes": sizes,
+        "queries": queries,
+        "slow_queries": slow,
+        "query_durations": durations,
+    }
+
+
+def quantile(values: list[float], q: float) -> float:
+    """Nearest rank quantile of sorted values"""
+    rank = max(1, round(q * len(values)))
+    return values[rank - 1]
+
+
+def _labels(**labels) -> str:
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _histogram_lines(
+    name: str, series: dict[tuple, dict]
+) -> list[str]:
+    lines = []
+    for (method, route), histogram in sorted(series.items()):
+        for bound, count in histogram["buckets"].items():
+            labels = _labels(method=method, route=route, le=bound)
+            lines.append(f"{name}_bucket{labels} {count}")
+        labels = _labels(method=method, route=route)
+        lines.append(f"{name}_sum{labels} {histogram['sum']}")
+        lines.append(f"{name}_count{labels} {histogram['count']}")
+    return lines
+
+
+def _query_lines(
+    name: str, queries: dict[tuple, list], field: int
+) -> list[str]:
+    return [
+        f"{name}{_labels(operation=operation, route=route)} "
+        f"{totals[field]}"
+        for (operation, route), totals in sorted(queries.items())
+    ]
+
+
+def _summary_lines(
+    name: str,
+    queries: dict[tuple, list],
+    durations: dict[str, list[float]],
+) -> list[str]:
+    # _sum and _count stay cumulative, summed over the routes
+    totals: dict[str, list] = {}
+    for (operation, _), (count, seconds) in queries.items():
+        total = totals.setdefault(operation, [0, 0.0])
+        total[0] += count
+        total[1] += seconds
+    lines = []
+    for operation, (count, seconds) in sorted(totals.items()):
+        values = sorted(durations.get(operation, []))
+        if values:
+            for q in QUANTILES:
+                labels = _labels(operation=operation, quantile=q)
+                lines.append(f"{name}{labels} {quantile(values, q)}")
+        labels = _labels(operation=operation)
+        lines.append(f"{name}_sum{labels} {seconds}")
+        lines.append(f"{name}_count{labels} {count}")
+    return lines
+
+
+def render(merged: dict) -> str:
+    """Prometheus text exposition format 0.0.4"""
+    lines = [
+        "# HELP http_requests_total Requests by route and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route, status), count in sorted(
+        merged["requests"].items()
+    ):
+        labels = _labels(method=method, route=route, status=status)
+        lines.append(f"http_requests_total{labels} {count}")
+    lines += [
+        "# HELP http_requests_in_flight Requests being served.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {merged['in_flight']}",
+        "# HELP http_request_duration_seconds Request latency.",
+        "# TYPE http_request_duration_seconds histogram",
+        *_histogram_lines(
+            "http_request_duration_seconds", merged["latency"]
+        ),
+        "# HELP http_response_size_bytes Response body size.",
+        "# TYPE http_response_size_bytes histogram",
+        *_histogram_lines(
+            "http_response_size_bytes", merged["sizes"]
+        ),
+        "# HELP db_queries_total SQL statements by repository method"
+        " and route.",
+        "# TYPE db_queries_total counter",
+        *_query_lines("db_queries_total", merged["queries"], 0),
+        "# HELP db_query_seconds_total Time in SQL statements by"
+        " repository method and route.",
+        "# TYPE db_query_seconds_total counter",
+        *_query_lines("db_query_seconds_total", merged["queries"], 1),
+        "# HELP db_slow_queries_total Statements over"
+        " SLOW_QUERY_SECONDS.",
+        "# TYPE db_slow_queries_total counter",
+    ]
+    for operation, count in sorted(merged["slow_queries"].items()):
+        labels = _labels(operation=operation)
+        lines.append(f"db_slow_queries_total{labels} {count}")
+    lines += [
+        "# HELP db_query_duration_seconds Statement latency by"
+        " repository method, quantiles of the latest statements.",
+        "# TYPE db_query_duration_seconds summary",
+        *_summary_lines(
+            "db_query_duration_seconds",
+            merged["queries"],
+            merged["query_durations"],
+        ),
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,25 @@
+from core.reference_data import reference_data
+
+
+def validate_category(category_name: str) -> str:
+    if category_name not in reference_data.maps.category_map:
+        raise ValueError("category.not_supported")
+    return category_name
+
+
+def validate_currency(currency_code: str) -> str:
+    if currency_code not in reference_data.maps.currency_map:
+        raise ValueError("currency.not_supported")
+    return currency_code
+
+
+def category_schema(schema: dict) -> None:
+    """Lists the categories loaded when the schema is generated"""
+    if reference_data.maps.category_map:
+        schema["enum"] = sorted(reference_data.maps.category_map)
+
+
+def currency_schema(schema: dict) -> None:
+    """Lists the currencies loaded when the schema is generated"""
+    if reference_data.maps.currency_map:
+        schema["enum"] = sorted(reference_data.maps.currency_map)
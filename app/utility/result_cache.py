@@ -0,0 +1,142 @@
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class IResultCache(ABC):
+    """
+    Per-user cache of read results. generation() is taken before a
+    read and handed to set(), so a result read across an
+    invalidation is dropped instead of stored.
+    """
+
+    @abstractmethod
+    def get(
+        self, user_id: uuid.UUID, key: Hashable
+    ) -> tuple[bool, Any]:
+        pass
+
+    @abstractmethod
+    def generation(self, user_id: uuid.UUID) -> int:
+        pass
+
+    @abstractmethod
+    def set(
+        self,
+        user_id: uuid.UUID,
+        key: Hashable,
+        value: Any,
+        generation: int,
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict[str, int]:
+        pass
+
+
+class LRUResultCache(IResultCache):
+    """
+    Bounded LRU with a TTL per entry, local to the worker. Only
+    touched from the event loop, so it takes no locks.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = (
+            OrderedDict()
+        )
+        self._user_keys: dict[uuid.UUID, set[Hashable]] = {}
+        # generations are bounded as well, an evicted one falls back
+        # to _floor, which is never below any generation handed out
+        self._generations: OrderedDict[uuid.UUID, int] = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _drop(self, user_id: uuid.UUID, key: Hashable) -> None:
+        self._entries.pop((user_id, key), None)
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+
+    def get(
+        self, user_id: uuid.UUID, key: Hashable
+    ) -> tuple[bool, Any]:
+        entry = self._entries.get((user_id, key))
+        if entry is None:
+            self.misses += 1
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            self._drop(user_id, key)
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end((user_id, key))
+        self.hits += 1
+        return True, value
+
+    def generation(self, user_id: uuid.UUID) -> int:
+        return self._generations.get(user_id, self._floor)
+
+    def set(
+        self,
+        user_id: uuid.UUID,
+        key: Hashable,
+        value: Any,
+        generation: int,
+    ) -> None:
+        if generation != self.generation(user_id):
+            return
+        self._entries[(user_id, key)] = (
+            self._clock() + self.ttl_seconds,
+            value,
+        )
+        self._entries.move_to_end((user_id, key))
+        self._user_keys.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            (old_user, old_key), _ = self._entries.popitem(last=False)
+            self._drop(old_user, old_key)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        for key in self._user_keys.pop(user_id, ()):
+            self._entries.pop((user_id, key), None)
+        self._counter += 1
+        self._generations[user_id] = self._counter
+        self._generations.move_to_end(user_id)
+        self.invalidations += 1
+        while len(self._generations) > self.max_entries:
+            _, evicted = self._generations.popitem(last=False)
+            self._floor = max(self._floor, evicted)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }